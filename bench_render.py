@@ -0,0 +1,88 @@
+# --- RENDER BENCHMARK: FULL VS LITE ---
+# Runs the app headlessly with Streamlit's AppTest and compares the full view
+# against lite mode on a seeded book.
+#
+#   python bench_render.py                # 2,000 offers, 5 runs per mode
+#   python bench_render.py --offers 20000 --runs 3
+#
+# "payload" is the serialized size of every element/block proto the script
+# sends on a first render (what goes over the websocket), "render" is the
+# wall-clock time of the script run on the server.
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from gfo_store import OfferStore
+
+APP_PATH = "gfo_crude_app.py"
+LOCATIONS = [
+    "Victoria, Texas",
+    "Stampede, North Dakota",
+    "Vernal, Utah",
+    "Pelican, Louisiana",
+    "Port Mackenzie"
+]
+
+
+def seed_book(n_offers, seed=7):
+    rng = random.Random(seed)
+    book = []
+    for _ in range(n_offers):
+        book.append({
+            "Location": rng.choice(LOCATIONS),
+            "Cents": rng.randrange(-600, 401, 5),
+            "Volume": rng.randrange(100, 5000, 100),
+            "Term": rng.choice(["1mo", "3mo", "6mo"]),
+            "User": f"Seller {rng.randrange(500)}",
+            "Status": rng.choice(["Pending", "Pending", "Pending", "Rejected"]),
+        })
+    return book
+
+
+def payload_bytes(node):
+    size = 0
+    proto = getattr(node, "proto", None)
+    if proto is not None and hasattr(proto, "ByteSize"):
+        size += proto.ByteSize()
+    for child in getattr(node, "children", {}).values():
+        size += payload_bytes(child)
+    return size
+
+
+def measure(lite, runs):
+    timings, sizes = [], []
+    for _ in range(runs):
+        at = AppTest.from_file(APP_PATH, default_timeout=120)
+        at.query_params["lite"] = "1" if lite else "0"
+        t0 = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - t0)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        sizes.append(payload_bytes(at._tree))
+    return statistics.median(timings), statistics.median(sizes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare full vs lite render cost.")
+    parser.add_argument("--offers", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # The app reads its book from GFO_DB_PATH; point it at a seeded scratch file
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    OfferStore(db_path).seed(seed_book(args.offers))
+    os.environ["GFO_DB_PATH"] = db_path
+    full_t, full_b = measure(lite=False, runs=args.runs)
+    lite_t, lite_b = measure(lite=True, runs=args.runs)
+
+    print(f"offers: {args.offers:,}  runs/mode: {args.runs}")
+    print(f"{'mode':<6}{'render (ms)':>14}{'payload (KB)':>15}")
+    print(f"{'full':<6}{full_t * 1000:>14.1f}{full_b / 1024:>15.1f}")
+    print(f"{'lite':<6}{lite_t * 1000:>14.1f}{lite_b / 1024:>15.1f}")
+    print(f"lite is {full_b / max(lite_b, 1):.1f}x smaller and {full_t / max(lite_t, 1e-9):.1f}x faster")
@@ -0,0 +1,127 @@
+# --- CAPACITY ALERT FAN-OUT ---
+# The write that takes a location to NEAR CAPACITY (80%) or FULL records the
+# crossing once, in the capacity_alerts table (see
+# OfferStore.apply_decisions). One dispatcher thread per process tails that
+# table into an in-memory history, so any number of open pages are notified
+# without querying the book themselves. External sinks (subscribers) are
+# delivered from a cursor kept in the book instead: the dispatcher claims
+# undelivered alerts in a write transaction, so no alert reaches the sinks
+# twice however many worker processes run a bus, and alerts raised while
+# none was running are still delivered:
+#
+#   bus = AlertBus(store, auction.id, auction.name)
+#   bus.subscribe(log_sink())
+#   bus.subscribe(webhook_outbox("gfo_alerts.jsonl"))
+#   bus.start()
+#
+# Pages pick alerts up from the bus's in-memory history (AlertBus.since).
+# A worker that dies between claiming a batch and handing it to its sinks
+# loses that batch: delivery is at most once, never twice.
+#
+# Every round has its own book, so alert IDs restart at 1 in each; alerts
+# carry their round (auction_id, auction) so sinks shared by all rounds can
+# tell them apart.
+import json
+import logging
+import threading
+from collections import deque, namedtuple
+
+Alert = namedtuple("Alert", "auction_id auction id location level filled capacity ts")
+ALERT_POLL_SECONDS = 1.0  # how often to look for alerts raised by other workers
+ALERT_BATCH = 500         # most alerts handed to subscribers at once
+RECENT_ALERTS = 200       # history kept for pages catching up
+
+log = logging.getLogger("gfo_alerts")
+
+
+class AlertBus:
+    def __init__(self, store, auction_id, auction_name):
+        self.store = store
+        self.auction_id = auction_id
+        self.auction_name = auction_name
+        self.last_id = store.last_alert_id()  # history: alerts before start-up are not replayed
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=RECENT_ALERTS)
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Register callback(alerts), called on the dispatcher thread with each
+        batch of alerts this process claimed (a list of Alert)."""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers.remove(callback)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="gfo-alerts", daemon=True)
+            self._thread.start()
+        return self
+
+    def since(self, after_id):
+        """Alerts delivered in this process after `after_id`, oldest first."""
+        return [a for a in list(self._recent) if a.id > after_id]
+
+    def _run(self):
+        while True:
+            # Woken at once by alerts raised in this process, otherwise poll
+            # for the ones other workers raised
+            self.store.alerts_posted.wait(ALERT_POLL_SECONDS)
+            self.store.alerts_posted.clear()
+            try:
+                while self.pump() == ALERT_BATCH:
+                    pass
+                while self.deliver() == ALERT_BATCH:
+                    pass
+            except Exception:
+                log.exception("alert dispatch failed")
+
+    def pump(self):
+        """Add the alerts recorded since the last pump to this process's
+        history. Returns how many."""
+        batch = [self._alert(row) for row in self.store.alerts_since(self.last_id, ALERT_BATCH)]
+        if not batch:
+            return 0
+        self._recent.extend(batch)
+        self.last_id = batch[-1].id
+        return len(batch)
+
+    def deliver(self):
+        """Claim undelivered alerts and hand them to the subscribers. Returns
+        how many were claimed."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return 0  # leave them for a worker that has sinks
+        batch = [self._alert(row) for row in self.store.claim_alerts(ALERT_BATCH)]
+        for callback in subscribers if batch else ():
+            try:
+                callback(batch)
+            except Exception:
+                log.exception("alert subscriber %r failed", callback)
+        return len(batch)
+
+    def _alert(self, row):
+        return Alert(self.auction_id, self.auction_name, *row)
+
+
+# --- SINKS ---
+def log_sink(logger=log):
+    def deliver(alerts):
+        for a in alerts:
+            logger.warning("%s · %s %s: %s of %s bbl accepted",
+                           a.auction, a.location, a.level, f"{a.filled:,}", f"{a.capacity:,}")
+    return deliver
+
+
+def webhook_outbox(path):
+    """Local stand-in for a webhook: each alert is appended to `path` as the
+    JSON body a webhook would be POSTed, one per line, a batch per write."""
+    def deliver(alerts):
+        with open(path, "a", encoding="utf-8") as out:
+            out.writelines(json.dumps(a._asdict()) + "\n" for a in alerts)
+    return deliver
@@ -0,0 +1,174 @@
+# --- COLD ARCHIVE ---
+# Offers in a terminal state (Rejected, Expired, Settled) leave the hot SQLite
+# book and land here: zstd-compressed Parquet, hive-partitioned by location
+# and month (of submission), e.g.
+#
+#   gfo_archive/location=Vernal%2C%20Utah/month=2026-10/part-120-988-0.parquet
+#
+# Reads prune partitions first, so a query for one terminal and month only
+# opens that directory's files.
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("location", pa.string()),
+    ("month", pa.string()),
+    ("price", pa.float64()),
+    ("volume", pa.int64()),
+    ("term", pa.string()),
+    ("user", pa.string()),
+    ("status", pa.string()),
+    ("created_at", pa.float64()),
+    ("updated_at", pa.float64()),
+])
+PARTITIONING = ds.partitioning(
+    pa.schema([("location", pa.string()), ("month", pa.string())]), flavor="hive"
+)
+
+
+def _month(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m")
+
+
+class SeenIds:
+    """Offer IDs already streamed, as a flat bitmap over the ID space
+    (one byte per ID up to the highest seen), so de-duplicating an export
+    costs the same however many rows each offer carries."""
+
+    def __init__(self):
+        self._seen = np.zeros(0, dtype=bool)
+
+    def first_time(self, ids):
+        # Mask of ids not seen before (nor earlier in `ids`); marks them seen
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return np.zeros(0, dtype=bool)
+        if ids.max() >= len(self._seen):
+            grown = np.zeros(max(int(ids.max()) + 1, 2 * len(self._seen)), dtype=bool)
+            grown[:len(self._seen)] = self._seen
+            self._seen = grown
+        fresh = ~self._seen[ids]
+        once = np.zeros(len(ids), dtype=bool)
+        once[np.unique(ids, return_index=True)[1]] = True
+        self._seen[ids] = True
+        return fresh & once
+
+
+class ColdArchive:
+    def __init__(self, root):
+        self.root = root
+
+    def write(self, rows):
+        """Append archived offer rows (tuples in ARCHIVE_SCHEMA order)."""
+        if not rows:
+            return
+        table = pa.Table.from_pylist(
+            [dict(zip(ARCHIVE_SCHEMA.names, r)) for r in rows], schema=ARCHIVE_SCHEMA
+        )
+        first, last = rows[0][0], rows[-1][0]
+        ds.write_dataset(
+            table,
+            self.root,
+            format="parquet",
+            partitioning=PARTITIONING,
+            basename_template=f"part-{first}-{last}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        )
+
+    def dataset(self):
+        if not os.path.isdir(self.root):
+            return None
+        return ds.dataset(self.root, schema=ARCHIVE_SCHEMA, format="parquet", partitioning=PARTITIONING)
+
+    def query(self, location=None, month=None, statuses=None, columns=None, limit=None):
+        """Archived offers matching the filters, sorted by ID. A batch written
+        twice (crash between archive write and hot delete) is deduplicated.
+        With `limit`, files are streamed until that many offers are found
+        (the first in scan order), so memory does not grow with history."""
+        dataset = self.dataset()
+        if dataset is None:
+            return pd.DataFrame(columns=columns or ARCHIVE_SCHEMA.names)
+        flt = self._filter(location, month, statuses)
+        if limit is None:
+            df = dataset.to_table(columns=columns, filter=flt).to_pandas()
+        else:
+            seen, batches, found = SeenIds(), [], 0
+            for batch in dataset.to_batches(columns=columns, filter=flt, batch_size=min(limit, 5000)):
+                batch = batch.filter(pa.array(seen.first_time(batch.column("id").to_numpy())))
+                batches.append(batch)
+                found += batch.num_rows
+                if found >= limit:
+                    break
+            schema = dataset.schema if columns is None else pa.schema([dataset.schema.field(c) for c in columns])
+            df = pa.Table.from_batches(batches, schema=schema).slice(0, limit).to_pandas()
+        if "id" in df:
+            df = df.drop_duplicates("id").sort_values("id", ignore_index=True)
+        return df
+
+    def iter_batches(self, location=None, statuses=None, since=None, until=None, batch_size=5000, seen=None):
+        """Archived offers as pyarrow RecordBatches, streamed file by file.
+        since / until are epoch seconds on created_at; they also prune whole
+        month partitions before any file is opened. Like query(), a batch
+        written twice is deduplicated; pass `seen` (a SeenIds) to also skip,
+        and record, IDs streamed elsewhere."""
+        dataset = self.dataset()
+        if dataset is None:
+            return
+        seen = SeenIds() if seen is None else seen
+        for batch in dataset.to_batches(filter=self._range_filter(location, statuses, since, until), batch_size=batch_size):
+            fresh = seen.first_time(batch.column("id").to_numpy())
+            if not fresh.all():
+                batch = batch.filter(pa.array(fresh))
+            if batch.num_rows:
+                yield batch
+
+    def count(self, location=None, statuses=None, since=None, until=None, month=None):
+        """Rows matching the iter_batches (or query) filters, counted from
+        file metadata where possible (a batch written twice counts twice)."""
+        dataset = self.dataset()
+        if dataset is None:
+            return 0
+        return dataset.count_rows(filter=self._range_filter(location, statuses, since, until, month))
+
+    def months(self, location=None):
+        """Months with archived offers, read off the partition paths: no
+        data file is opened, so the cost does not grow with history."""
+        dataset = self.dataset()
+        if dataset is None:
+            return []
+        flt = ds.field("location") == location if location else None
+        return sorted({
+            ds.get_partition_keys(fragment.partition_expression)["month"]
+            for fragment in dataset.get_fragments(filter=flt)
+        })
+
+    def _range_filter(self, location, statuses, since, until, month=None):
+        flt = self._filter(location, month, statuses)
+        for expr in (
+            ds.field("month") >= _month(since) if since is not None else None,
+            ds.field("month") <= _month(until) if until is not None else None,
+            ds.field("created_at") >= since if since is not None else None,
+            ds.field("created_at") < until if until is not None else None,
+        ):
+            if expr is not None:
+                flt = expr if flt is None else flt & expr
+        return flt
+
+    @staticmethod
+    def _filter(location, month, statuses):
+        flt = None
+        for expr in (
+            ds.field("location") == location if location else None,
+            ds.field("month") == month if month else None,
+            ds.field("status").isin(list(statuses)) if statuses else None,
+        ):
+            if expr is not None:
+                flt = expr if flt is None else flt & expr
+        return flt
@@ -0,0 +1,162 @@
+# --- AUCTION ROUNDS ---
+# Overlapping monthly rounds, each a partition of its own: its locations and
+# per-location capacities, submission window, and a separate book file and
+# cold archive. Every round therefore has its own offer ID space, indexes and
+# aggregates, and nothing that reads one round ever scans another.
+#
+# The registry is a small SQLite catalog next to the books:
+#
+#   gfo_auctions.db        rounds and their locations
+#   gfo_round_2.db         round 2's book (an OfferStore file)
+#   gfo_archive_round_2/   round 2's cold archive
+#
+# Book and archive paths are stored relative to the registry's directory.
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+MIGRATIONS = [
+    [
+        """
+        CREATE TABLE auctions (
+            id         INTEGER PRIMARY KEY AUTOINCREMENT,
+            name       TEXT    NOT NULL UNIQUE,
+            opens_at   REAL,            -- NULL: open from the start
+            closes_at  REAL,            -- NULL: open until closed by hand
+            book       TEXT    NOT NULL,
+            archive    TEXT    NOT NULL,
+            created_at REAL    NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE auction_locations (
+            auction_id INTEGER NOT NULL REFERENCES auctions (id),
+            position   INTEGER NOT NULL,
+            location   TEXT    NOT NULL,
+            capacity   INTEGER NOT NULL,
+            PRIMARY KEY (auction_id, location)
+        ) WITHOUT ROWID
+        """,
+    ],
+]
+
+
+class Auction(namedtuple("Auction", "id name opens_at closes_at book_path archive_dir capacities")):
+    """One round. `capacities` is {location: bbl}, in display order."""
+
+    @property
+    def locations(self):
+        return list(self.capacities)
+
+    def is_open(self, now=None):
+        now = time.time() if now is None else now
+        return (self.opens_at is None or now >= self.opens_at) and (self.closes_at is None or now < self.closes_at)
+
+    def window(self):
+        def fmt(ts):
+            return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%b %d %H:%M UTC")
+        opens = "open" if self.opens_at is None else fmt(self.opens_at)
+        closes = "until closed" if self.closes_at is None else fmt(self.closes_at)
+        return f"{opens} → {closes}"
+
+
+class AuctionRegistry:
+    def __init__(self, path):
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        self._local = threading.local()
+        with self._write() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for step, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {step}")
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # --- WRITES ---
+    def create(self, name, capacities, opens_at=None, closes_at=None, book=None, archive=None):
+        """Register a round. `capacities` is {location: bbl}; book and archive
+        default to fresh per-round paths next to the registry."""
+        with self._write() as conn:
+            return self._create(conn, name, capacities, opens_at, closes_at, book, archive)
+
+    def ensure_first(self, name, capacities, book, archive):
+        """Register the pre-existing book as the first round if there is no
+        round yet. Returns the new round, or None if rounds already exist."""
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM auctions LIMIT 1").fetchone():
+                return None
+            return self._create(conn, name, capacities, None, None, book, archive)
+
+    def _create(self, conn, name, capacities, opens_at, closes_at, book, archive):
+        cur = conn.execute(
+            "INSERT INTO auctions (name, opens_at, closes_at, book, archive, created_at) VALUES (?, ?, ?, '', '', ?)",
+            (name, opens_at, closes_at, time.time()),
+        )
+        auction_id = cur.lastrowid
+        # Given paths are relative to the working directory, stored relative to the registry
+        book = os.path.relpath(os.path.abspath(book), self.root) if book else f"gfo_round_{auction_id}.db"
+        archive = os.path.relpath(os.path.abspath(archive), self.root) if archive else f"gfo_archive_round_{auction_id}"
+        conn.execute("UPDATE auctions SET book = ?, archive = ? WHERE id = ?", (book, archive, auction_id))
+        conn.executemany(
+            "INSERT INTO auction_locations (auction_id, position, location, capacity) VALUES (?, ?, ?, ?)",
+            [(auction_id, k, loc, int(cap)) for k, (loc, cap) in enumerate(capacities.items())],
+        )
+        return self._get(conn, auction_id)
+
+    def close(self, auction_id, when=None):
+        """Stop submissions to a round (now, unless `when` is given)."""
+        with self._write() as conn:
+            conn.execute("UPDATE auctions SET closes_at = ? WHERE id = ?", (time.time() if when is None else when, auction_id))
+
+    # --- READS ---
+    def get(self, auction_id):
+        return self._get(self.conn, auction_id)
+
+    def _get(self, conn, auction_id):
+        row = conn.execute(
+            "SELECT id, name, opens_at, closes_at, book, archive FROM auctions WHERE id = ?", (auction_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._auction(conn, row)
+
+    def auctions(self):
+        """Every round, newest first."""
+        rows = self.conn.execute(
+            "SELECT id, name, opens_at, closes_at, book, archive FROM auctions ORDER BY id DESC"
+        ).fetchall()
+        return [self._auction(self.conn, row) for row in rows]
+
+    def _auction(self, conn, row):
+        auction_id, name, opens_at, closes_at, book, archive = row
+        capacities = dict(conn.execute(
+            "SELECT location, capacity FROM auction_locations WHERE auction_id = ? ORDER BY position", (auction_id,)
+        ).fetchall())
+        return Auction(
+            auction_id, name, opens_at, closes_at,
+            os.path.join(self.root, book), os.path.join(self.root, archive), capacities,
+        )
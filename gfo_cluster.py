@@ -0,0 +1,241 @@
+# --- MULTI-PROCESS DEPLOYMENT ---
+# One Streamlit process renders on one core. To ride out auction-close spikes,
+# run several app workers on the same book file behind a small local load
+# balancer:
+#
+#   python gfo_cluster.py serve --workers 4            # balancer on :8501
+#   python gfo_cluster.py bench --workers 4            # throughput + consistency check
+#
+# Workers share nothing but the SQLite book (WAL mode): writes serialize in
+# the store's BEGIN IMMEDIATE transactions, so capacity checks hold across
+# processes, and each session notices other workers' writes through the
+# store's version counter (see watch_book in gfo_crude_app.py).
+import argparse
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+from bench_render import seed_book
+from gfo_store import CapacityError, OfferStore
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gfo_crude_app.py")
+LOCATIONS = [
+    "Victoria, Texas",
+    "Stampede, North Dakota",
+    "Vernal, Utah",
+    "Pelican, Louisiana",
+    "Port Mackenzie"
+]
+MAX_VOLUME = 30000
+
+log = logging.getLogger("gfo_cluster")
+
+
+# --- LOAD BALANCER ---
+# Plain TCP proxy with client-address affinity. The book is shared, but each
+# worker keeps its own Streamlit sessions (session state: idempotency keys,
+# admin worklists, the round pick) and its own media files (export
+# downloads). A websocket reconnect or a /media/ GET must therefore reach the
+# worker that served the page, so every connection from one client address
+# goes to the same worker. Rendezvous hashing picks it: when a worker is
+# down, only its clients move, to their next choice.
+#
+# Clients whose address changes (a phone switching networks) start a fresh
+# session on reconnect, as they would against a single restarted worker.
+class Balancer:
+    def __init__(self, backends):
+        self.backends = backends
+
+    def route(self, client_ip):
+        # Backends in this client's order of preference, stable across restarts
+        return sorted(self.backends, key=lambda port: zlib.crc32(f"{client_ip}|{port}".encode()), reverse=True)
+
+    async def _pipe(self, reader, writer):
+        try:
+            while data := await reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, client_reader, client_writer):
+        # Try the client's own worker first, fall through to the others if it is down
+        client_ip = (client_writer.get_extra_info("peername") or ("",))[0]
+        for port in self.route(client_ip):
+            try:
+                up_reader, up_writer = await asyncio.open_connection("127.0.0.1", port)
+            except OSError:
+                continue
+            await asyncio.gather(
+                self._pipe(client_reader, up_writer),
+                self._pipe(up_reader, client_writer),
+            )
+            return
+        log.warning("no worker available")
+        client_writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        log.info("balancing :%d across workers %s", port, self.backends)
+        async with server:
+            await server.serve_forever()
+
+
+def serve(args):
+    # One cookie secret for all workers, so a client moved to another worker
+    # when its own goes down still passes the XSRF check
+    env = dict(os.environ, GFO_DB_PATH=os.path.abspath(args.db),
+               STREAMLIT_SERVER_COOKIE_SECRET=secrets.token_hex(32))
+    # Initialize (and migrate) the book once, before the workers race to it
+    OfferStore(env["GFO_DB_PATH"])
+
+    ports = [args.worker_port + k for k in range(args.workers)]
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", APP_PATH,
+             "--server.port", str(port),
+             "--server.address", "127.0.0.1",
+             "--server.headless", "true"],
+            env=env,
+        )
+        for port in ports
+    ]
+    try:
+        asyncio.run(Balancer(ports).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+
+
+# --- BENCHMARK ---
+# Each bench worker is a separate process running the real app script with
+# Streamlit's AppTest, against one shared book, while also writing to it the
+# way sellers and the owner do (a submission per render, a repeated one every
+# tenth, a decision batch every fifth render). Afterwards the book is checked
+# for consistency.
+def _bench_worker(db_path, seconds, seed, barrier, results):
+    logging.disable(logging.WARNING)
+    os.environ["GFO_DB_PATH"] = db_path
+    from streamlit.testing.v1 import AppTest
+
+    store = OfferStore(db_path)
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.run()  # warm-up: imports and first-run caches
+    barrier.wait()
+
+    renders = submitted = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        renders += 1
+
+        # Submitted the way the form does; every tenth one is sent twice, like
+        # a double-tap, and must not add a second offer
+        key = f"bench-{seed}-{submitted}"
+        offer = (rng.choice(LOCATIONS), rng.randrange(-600, 401), rng.randrange(100, 3000, 100),
+                 rng.choice(["1mo", "3mo", "6mo"]), f"Bench {seed}")
+        store.submit(key, *offer).result()
+        if renders % 10 == 0:
+            store.submit(key, *offer).result()
+        submitted += 1
+        if renders % 5 == 0:
+            pending, _ = store.query_offers(rng.choice(LOCATIONS), statuses=("Pending",), limit=20)
+            decisions = {int(x): rng.choice(["Accepted", "Rejected"]) for x in pending["ID"]}
+            try:
+                store.apply_decisions(decisions, MAX_VOLUME)
+            except CapacityError:
+                store.apply_decisions({k: "Rejected" for k in decisions}, MAX_VOLUME)
+    results.put((renders, submitted))
+
+
+def _run_bench(n_workers, seconds, n_offers):
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    store = OfferStore(db_path)
+    store.seed(seed_book(n_offers))
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(n_workers + 1)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_bench_worker, args=(db_path, seconds, k, barrier, results))
+        for k in range(n_workers)
+    ]
+    for p in procs:
+        p.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    counts = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - t0
+    for p in procs:
+        p.join()
+    if any(p.exitcode for p in procs):
+        raise SystemExit("a bench worker crashed")
+
+    renders = sum(r for r, _ in counts)
+    submitted = sum(s for _, s in counts)
+
+    # --- CONSISTENCY CHECKS ---
+    problems = []
+    n_book = store.conn.execute("SELECT COUNT(*) FROM offers").fetchone()[0]
+    if n_book != n_offers + submitted:
+        problems.append(f"{n_book:,} offers in the book, expected {n_offers + submitted:,}")
+    for loc in LOCATIONS:
+        filled = store.accepted_volume(loc)
+        if filled > MAX_VOLUME:
+            problems.append(f"{loc} overfilled: {filled:,} > {MAX_VOLUME:,}")
+    return renders / elapsed, problems
+
+
+def bench(args):
+    print(f"{'workers':>8}{'renders/s':>12}{'speedup':>10}")
+    baseline = None
+    failed = False
+    for n in sorted({1, args.workers}):
+        rate, problems = _run_bench(n, args.seconds, args.offers)
+        baseline = baseline or rate
+        print(f"{n:>8}{rate:>12.1f}{rate / baseline:>9.2f}x")
+        for problem in problems:
+            print(f"  INCONSISTENT: {problem}")
+        failed = failed or bool(problems)
+    if failed:
+        raise SystemExit(1)
+    print("book consistent across workers")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run or benchmark several app workers on one book.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="start N app workers behind a local load balancer")
+    p_serve.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    p_serve.add_argument("--host", default="0.0.0.0")
+    p_serve.add_argument("--port", type=int, default=8501, help="load balancer port")
+    p_serve.add_argument("--worker-port", type=int, default=8601, help="first worker port")
+    p_serve.add_argument("--db", default=os.environ.get("GFO_DB_PATH", "gfo_auction.db"))
+    p_serve.set_defaults(func=serve)
+
+    p_bench = sub.add_parser("bench", help="compare 1 vs N workers on a shared scratch book")
+    p_bench.add_argument("--workers", type=int, default=4)
+    p_bench.add_argument("--seconds", type=float, default=10)
+    p_bench.add_argument("--offers", type=int, default=2000, help="starting book size")
+    p_bench.set_defaults(func=bench)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    args = parser.parse_args()
+    args.func(args)
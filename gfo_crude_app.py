@@ -1,7 +1,24 @@
+import importlib.util
+import os
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import TimeoutError as QueueTimeout
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 
+from gfo_alerts import AlertBus, log_sink, webhook_outbox
+from gfo_archive import ColdArchive
+from gfo_auctions import AuctionRegistry
+from gfo_export import EXPORT_FORMATS, count_export_rows, export_bytes
+from gfo_simulator import cleared_offers, simulate_clearing
+from gfo_store import LIVE_STATUSES, TERMINAL_STATUSES, CapacityError, OfferConflict, OfferStore
+from gfo_views import ViewCache
+
 # --- CONFIGURATION & STYLING ---
 st.set_page_config(
     page_title="GFO Auction Block", 
@@ -65,17 +82,44 @@ st.markdown("""
 
 
 # --- DATA INITIALIZATION ---
-if 'auction_data' not in st.session_state:
-    st.session_state.auction_data = [
-        {"ID": 1, "Location": "Victoria, Texas", "Price": 2.50, "Volume": 5000, "Term": "1 month", "User": "Seller A", "Status": "Pending"},
-        {"ID": 2, "Location": "Victoria, Texas", "Price": 2.10, "Volume": 3600, "Term": "3 months", "User": "Seller B", "Status": "Accepted"},
-        {"ID": 3, "Location": "Stampede, North Dakota", "Price": -4.00, "Volume": 2000, "Term": "6 months", "User": "Seller C", "Status": "Pending"},
-    ]
-
-if 'order_id_counter' not in st.session_state:
-    st.session_state.order_id_counter = 4
+# Each auction round has its own book, a SQLite file shared by every session
+# (see gfo_store.py). These are the first round's book and archive.
+DB_PATH = os.environ.get("GFO_DB_PATH", "gfo_auction.db")
+# Rejected / expired / settled offers are moved here as Parquet (see gfo_archive.py)
+ARCHIVE_DIR = os.environ.get("GFO_ARCHIVE_DIR", "gfo_archive")
+# Rounds, their terminals and capacities (see gfo_auctions.py)
+AUCTIONS_PATH = os.environ.get("GFO_AUCTIONS_PATH", os.path.join(os.path.dirname(DB_PATH), "gfo_auctions.db"))
+ALERT_OUTBOX = os.environ.get("GFO_ALERT_OUTBOX", "gfo_alerts.jsonl")
+
+# Demo rows for a fresh book, only with GFO_DEMO=1: the book is persistent and
+# shared, so seeded acceptances would use up real capacity
+DEMO_MODE = os.environ.get("GFO_DEMO", "").lower() in ("1", "true", "yes", "on")
+SEED_OFFERS = [
+    {"Location": "Victoria, Texas", "Cents": 250, "Volume": 5000, "Term": "1 month", "User": "Seller A", "Status": "Pending"},
+    {"Location": "Victoria, Texas", "Cents": 210, "Volume": 3600, "Term": "3 months", "User": "Seller B", "Status": "Accepted"},
+    {"Location": "Stampede, North Dakota", "Cents": -400, "Volume": 2000, "Term": "6 months", "User": "Seller C", "Status": "Pending"},
+]
 
-locations = [
+# --- MONEY (DISPLAY EDGE) ---
+# The store and the simulator work in integer cents and whole barrels.
+# Dollars exist only here: parsed from inputs, formatted for display.
+def to_cents(dollars):
+    return round(dollars * 100)
+
+def fmt_cents(cents):
+    # $+2.50 / $-4.00, straight from the integer
+    cents = round(cents)
+    return f"${'-' if cents < 0 else '+'}{abs(cents) // 100:,}.{abs(cents) % 100:02d}"
+
+def in_dollars(df, columns):
+    # {cents column: dollars column}, in place of the cents column, for drawing
+    df = df.copy()
+    for cents, name in columns.items():
+        df.insert(df.columns.get_loc(cents), name, df.pop(cents) / 100)
+    return df
+
+# Terminals and capacity of the first round, and the defaults for new rounds
+DEFAULT_LOCATIONS = [
     "Victoria, Texas", 
     "Stampede, North Dakota", 
     "Vernal, Utah", 
@@ -85,9 +129,89 @@ locations = [
 
 MAX_VOLUME = 30000
 
+@st.cache_resource
+def get_registry(path):
+    registry = AuctionRegistry(path)
+    # First start: the existing book becomes round 1
+    if registry.ensure_first("Round 1", {loc: MAX_VOLUME for loc in DEFAULT_LOCATIONS}, DB_PATH, ARCHIVE_DIR) and DEMO_MODE:
+        OfferStore(DB_PATH).seed(SEED_OFFERS)
+    return registry
+
+# One store per round, shared by every session viewing it
+@st.cache_resource
+def get_store(path, archive_dir):
+    return OfferStore(path, ColdArchive(archive_dir))
+
+# One alert dispatcher per round and process, shared by every session. The
+# sinks get each alert at most once in all: workers claim them from the book.
+# Every round's bus writes to the same sinks, so alerts carry their round.
+@st.cache_resource
+def get_alert_bus(path, outbox, auction_id, auction_name, _store):
+    bus = AlertBus(_store, auction_id, auction_name)
+    bus.subscribe(log_sink())
+    bus.subscribe(webhook_outbox(outbox))
+    return bus.start()
+
+# One view-model cache per round and process, shared by every session
+@st.cache_resource
+def get_view_cache(path):
+    return ViewCache()
+
+registry = get_registry(AUCTIONS_PATH)
+
+# --- AUCTION ROUND PICKER ---
+# Defaults to ?round=<id>, else the newest open round. Per-terminal widget
+# state (filters, pages, decision worklists) belongs to the round it was made
+# in, so it is dropped when the round changes.
+ROUND_KEYS = ("round_pick", "round_id", "my_name", "last_submission", "admin_notice")
+
+def round_label(a):
+    if a.is_open():
+        return a.name
+    if a.opens_at is not None and time.time() < a.opens_at:
+        return f"{a.name} (opens {a.window().split(' → ')[0]})"
+    return f"{a.name} (closed)"
+
+auctions = {a.id: a for a in registry.auctions()}
+if "switch_round" in st.session_state:
+    st.session_state.round_pick = st.session_state.pop("switch_round")
+if st.session_state.get("round_pick") not in auctions:
+    wanted = st.query_params.get("round", "")
+    open_rounds = [k for k, a in auctions.items() if a.is_open()]
+    st.session_state.round_pick = int(wanted) if wanted.isdigit() and int(wanted) in auctions else (open_rounds or list(auctions))[0]
+round_id = st.sidebar.selectbox("🗓️ Auction round", list(auctions), format_func=lambda k: round_label(auctions[k]), key="round_pick")
+auction = auctions[round_id]
+if st.session_state.get("round_id") != auction.id:
+    for key in [k for k in st.session_state if k not in ROUND_KEYS]:
+        del st.session_state[key]
+    st.session_state.round_id = auction.id
+
+store = get_store(auction.book_path, auction.archive_dir)
+alert_bus = get_alert_bus(auction.book_path, ALERT_OUTBOX, auction.id, auction.name, store)
+views = get_view_cache(auction.book_path)
+locations = auction.locations
+
 # --- MOBILE-FRIENDLY SUBMIT SECTION ---
+# Each submission carries an idempotency key. A double-tap or a reconnect
+# replaying the same submit within SUBMIT_DEDUPE_SECONDS reuses the key of
+# the identical submission just made, so the store keeps a single offer.
+SUBMIT_DEDUPE_SECONDS = 30
+SUBMIT_WAIT_SECONDS = 2
+
+def submission_key(fields):
+    last = st.session_state.get("last_submission")
+    now = time.time()
+    if last and last["fields"] == fields and now - last["at"] < SUBMIT_DEDUPE_SECONDS:
+        return last["key"]
+    key = uuid.uuid4().hex
+    st.session_state.last_submission = {"fields": fields, "key": key, "at": now}
+    return key
+
 with st.expander("🚀 Tap to Submit New Offer", expanded=False):
     st.write("### New Offer Entry")
+    round_open = auction.is_open()
+    if not round_open:
+        st.info(f"{auction.name} is not taking offers ({auction.window()}).")
     with st.form("offer_form"):
         m_col1, m_col2 = st.columns(2)
         with m_col1:
@@ -103,157 +227,865 @@ with st.expander("🚀 Tap to Submit New Offer", expanded=False):
         with r2_col3:
             term = st.selectbox("Term", ["1mo", "3mo", "6mo"])
             
-        submitted = st.form_submit_button("📢 Submit Offer", use_container_width=True)
+        submitted = st.form_submit_button("📢 Submit Offer", use_container_width=True, disabled=not round_open)
         
         if submitted:
             if user_name:
-                new_offer = {
-                    "ID": st.session_state.order_id_counter,
-                    "Location": location,
-                    "Price": price,
-                    "Volume": volume,
-                    "Term": term,
-                    "User": user_name,
-                    "Status": "Pending"
-                }
-                st.session_state.auction_data.append(new_offer)
-                st.session_state.order_id_counter += 1
-                st.toast("✅ Offer Sent to Admin!", icon="🚀")
+                price_cents, volume = to_cents(price), int(volume)
+                key = submission_key((auction.id, user_name, location, price_cents, volume, term))
+                try:
+                    ticket = store.submit(key, location, price_cents, volume, term, user_name)
+                    offer_id, duplicate = ticket.result(timeout=SUBMIT_WAIT_SECONDS)
+                except QueueTimeout:
+                    st.toast("⏳ Offer queued, it will show on the board shortly.", icon="🚀")
+                except Exception as e:
+                    st.error(f"Offer not saved: {e}")
+                else:
+                    if duplicate:
+                        st.toast(f"Offer #{offer_id} was already received.", icon="♻️")
+                    else:
+                        st.toast("✅ Offer Sent to Admin!", icon="🚀")
             else:
                 st.error("Name required.")
 
+# --- SELLER DASHBOARD ---
+# Read straight from the store's per-seller rollups, so it costs the same
+# however large the book gets.
+# Sellers amend (price / volume) or cancel their own pending offers. Each edit
+# names the offer version it was made against, so an offer decided or changed
+# elsewhere in the meantime is refused rather than overwritten.
+def render_my_offers(me):
+    mine = store.seller_offers(me)
+    if mine.empty:
+        return
+    st.write("##### Pending offers")
+    # The editor is keyed by what it shows: if the offers change underneath,
+    # it starts fresh instead of applying edits to the wrong rows
+    shown = abs(hash(tuple(zip(mine["ID"].tolist(), mine["Version"].tolist()))))
+    with st.form("my_offers_form"):
+        mine["Cancel"] = False
+        edited = st.data_editor(
+            in_dollars(mine, {"Cents": "Price"})[["ID", "Location", "Price", "Volume", "Term", "Version", "Cancel"]],
+            hide_index=True,
+            disabled=["ID", "Location", "Term", "Version"],
+            column_config={
+                "Price": st.column_config.NumberColumn("Diff ($)", format="$%.2f", step=0.05, required=True),
+                "Volume": st.column_config.NumberColumn("Vol (bbl)", format="%d", min_value=100, step=100, required=True),
+            },
+            key=f"my_offers_{shown}",
+            width='stretch'
+        )
+        save = st.form_submit_button("💾 Save changes")
+    last_shown = st.session_state.get("my_offers_shown")
+    st.session_state.my_offers_shown = shown
+    if not save:
+        return
+    if last_shown != shown:
+        st.warning("Your offers changed while you were editing. Check them and save again.")
+        return
+
+    changed, problems = 0, []
+    for before, after in zip(mine.itertuples(), edited.itertuples()):
+        try:
+            if after.Cancel:
+                store.cancel_offer(before.ID, me, before.Version)
+            elif pd.isna(after.Price) or pd.isna(after.Volume) or after.Volume <= 0:
+                problems.append(f"Offer #{before.ID} needs a price and a positive volume")
+                continue
+            elif (to_cents(after.Price), after.Volume) != (before.Cents, before.Volume):
+                store.amend_offer(before.ID, me, before.Version, to_cents(after.Price), after.Volume)
+            else:
+                continue
+            changed += 1
+        except (OfferConflict, ValueError) as e:
+            problems.append(str(e))
+    for problem in problems:
+        st.warning(problem)
+    if changed and not problems:
+        st.session_state.seller_notice = f"✅ {changed:,} offer(s) updated"
+        st.rerun()
+
+with st.expander("👤 My Offers", expanded=False):
+    me = st.text_input("Seller Name", key="my_name", placeholder="Name you submit offers under").strip()
+    if "seller_notice" in st.session_state:
+        st.toast(st.session_state.pop("seller_notice"), icon="✏️")
+    if me:
+        summary = store.seller_summary(me)
+        if summary is None:
+            st.caption("No offers under this name yet.")
+        else:
+            s_col1, s_col2, s_col3, s_col4 = st.columns(4)
+            s_col1.metric("Offered", f"{summary['Offered']:,} bbl", f"{summary['Offers']:,} offers", delta_color="off")
+            s_col2.metric("Accepted", f"{summary['Accepted']:,} bbl")
+            s_col3.metric("Pending", f"{summary['Pending']:,} bbl")
+            s_col4.metric("Avg Diff", fmt_cents(summary["Avg Cents"]))
+            st.dataframe(
+                in_dollars(store.seller_breakdown(me), {"Avg Cents": "Avg Diff"}),
+                hide_index=True,
+                column_config={"Avg Diff": st.column_config.NumberColumn(format="$%.2f")},
+                width='stretch'
+            )
+            render_my_offers(me)
+
 # --- ADMIN PANEL TOGGLE (SIDEBAR) ---
 st.sidebar.title("Admin Control")
 admin_mode = st.sidebar.checkbox("Enable Owner View")
 st.sidebar.info("Use this toggle to accept/reject offers.")
+if "admin_notice" in st.session_state:
+    st.toast(st.session_state.pop("admin_notice"), icon="🛡️")
+
+# --- LITE MODE (LOW BANDWIDTH) ---
+# Field users on rural wellsite connections get a lite view: no Plotly gauges,
+# no Styler tables, one location at a time and a paginated plain board.
+# Picked automatically for mobile browsers, forced with ?lite=1 / ?lite=0,
+# and always overridable from the sidebar toggle.
+LITE_PAGE_SIZE = 25
+MOBILE_UA_TAGS = ("Mobi", "Android", "iPhone", "iPad")
+
+def detect_lite_mode():
+    forced = st.query_params.get("lite")
+    if forced is not None:
+        return forced.lower() not in ("0", "false", "off", "no")
+    user_agent = st.context.headers.get("User-Agent") or ""
+    return any(tag in user_agent for tag in MOBILE_UA_TAGS)
+
+st.sidebar.divider()
+lite_mode = st.sidebar.toggle("📶 Lite mode (low bandwidth)", value=detect_lite_mode())
+
+
+def banner(pct_full):
+    if pct_full >= 1.0:
+        return "error", "⛔ LOCATION FULL"
+    elif pct_full >= 0.8:
+        return "warning", "⚠️ NEAR CAPACITY"
+    else:
+        return "success", "✅ OPEN FOR BIDS"
+
+
+def status_banner(banner):
+    kind, text = banner
+    getattr(st, kind)(text)
+
+
+def gauge_figure(accepted_vol, capacity):
+    # Create the Gauge Chart
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = accepted_vol,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "<b>Filled Capacity</b><br><span style='font-size:0.8em;color:gray'>Barrels per Day</span>"},
+        gauge = {
+            'axis': {'range': [None, capacity], 'tickwidth': 1, 'tickcolor': "white"},
+            'bar': {'color': "#4b9fff"}, 
+            'bgcolor': "#262730",
+            'borderwidth': 2,
+            'bordercolor': "#464B5C",
+            'steps': [
+                {'range': [0, capacity], 'color': "#262730"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': capacity
+            }
+        }
+    ))
+    
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        font={'color': "white", 'family': "Arial"},
+        margin=dict(l=30, r=30, t=50, b=10),
+        height=250
+    )
+    return fig
+
+
+def render_capacity_full(i, loc, view):
+    figures = location_figures(loc, view)
+    # --- GAUGE VISUALIZER ---
+    g_col1, g_col2, g_col3 = st.columns([1, 1, 1])
+    
+    with g_col1:
+        # FIXED LINE BELOW: Added key=f"gauge_{i}"
+        st.plotly_chart(figures.gauge, use_container_width=True, key=f"gauge_{i}")
+
+    with g_col3:
+        st.write("### Space Remaining")
+        st.markdown(f"""
+        <div style="border: 1px solid #464B5C; border-radius: 10px; padding: 20px; text-align: center; background-color: #262730;">
+            <h2 style="color: #2ECC71; margin:0;">{view.remaining:,}</h2>
+            <p style="color: #FAFAFA; margin:0;">Barrels Available</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        st.write("") # Spacer
+        status_banner(view.banner)
+        supply_summary(view.supply)
 
-# --- MAIN DASHBOARD ---
-st.title("🛢️ GFO Auction Block")
-st.markdown("### Sell your crude before the capacity fills up!")
-st.divider()
+    with g_col2:
+        if figures.supply is None:
+            st.caption("No live offers yet.")
+        else:
+            st.plotly_chart(figures.supply, width='stretch', key=f"supply_{i}")
+
+
+# --- SUPPLY STACK ---
+# Cumulative live volume by differential (cheapest first), the volume-weighted
+# average differential and the marginal differential at which capacity fills.
+# All read from aggregates the store keeps current on every offer change.
+def supply_summary(supply):
+    vwap = "—" if supply["vwap"] is None else fmt_cents(supply["vwap"])
+    fills_at = "not yet" if supply["fills_at"] is None else fmt_cents(supply["fills_at"])
+    st.caption(f"VWAP diff **{vwap}** · capacity fills at **{fills_at}** · {supply['live_volume']:,} bbl live")
+
+
+def supply_figure(loc, capacity, supply):
+    curve = store.supply_curve(loc)
+    if curve.empty:
+        return None
+
+    fig = go.Figure(go.Scatter(
+        x=curve["Cumulative"], y=curve["Cents"] / 100, mode="lines", line={'shape': "vh", 'color': "#F39C12"},
+        hovertemplate="%{x:,} bbl @ $%{y:+.2f}<extra></extra>"
+    ))
+    fig.add_vline(x=capacity, line={'color': "red", 'dash': "dash"})
+    if supply["fills_at"] is not None:
+        fig.add_hline(y=supply["fills_at"] / 100, line={'color': "#2ECC71", 'dash': "dot"})
+    fig.update_layout(
+        title={'text': "<b>Supply Stack</b>", 'font': {'size': 14}},
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="#262730",
+        font={'color': "white", 'family': "Arial"},
+        margin=dict(l=30, r=30, t=50, b=10),
+        xaxis={'title': "Cumulative bbl"},
+        yaxis={'title': "Diff ($)"},
+        height=250
+    )
+    return fig
+
+
+# --- FILL HISTORY ---
+# Drawn from the store's pre-aggregated tiers (raw ring buffer, per-minute,
+# per-hour), so the chart stays small however long the history gets.
+HISTORY_WINDOWS = {"1 hour": 3600, "24 hours": 24 * 3600, "7 days": 7 * 24 * 3600, "30 days": 30 * 24 * 3600, "All": None}
+
+def render_fill_history(i, loc, capacity):
+    if not st.toggle("📈 Show fill history", key=f"hist_{i}"):
+        return
+    window = st.radio("Window", list(HISTORY_WINDOWS), index=1, horizontal=True, key=f"hist_window_{i}")
+    hist = store.fill_history(loc, HISTORY_WINDOWS[window])
+    if hist.empty:
+        st.caption("No acceptances in this window.")
+        return
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=hist["Time"], y=hist["High"], line={'width': 0}, hoverinfo="skip", showlegend=False))
+    fig.add_trace(go.Scatter(
+        x=hist["Time"], y=hist["Low"], fill="tonexty", fillcolor="rgba(75,159,255,0.2)",
+        line={'width': 0}, hoverinfo="skip", showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=hist["Time"], y=hist["Filled"], mode="lines+markers", line={'shape': "hv", 'color': "#4b9fff"}, name="Filled"
+    ))
+    fig.add_hline(y=capacity, line={'color': "red", 'dash': "dash"})
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="#262730",
+        font={'color': "white", 'family': "Arial"},
+        margin=dict(l=30, r=30, t=20, b=10),
+        yaxis={'title': "bpd filled", 'range': [0, capacity * 1.05]},
+        xaxis={'title': "UTC"},
+        showlegend=False,
+        height=250
+    )
+    st.plotly_chart(fig, width='stretch', key=f"hist_chart_{i}")
+
+
+def render_capacity_lite(view):
+    # Compact text + native progress bar instead of a Plotly gauge
+    st.progress(view.pct_full, text=f"**{view.accepted:,} / {view.capacity:,} bpd filled** · {view.remaining:,} bbl available")
+    status_banner(view.banner)
+    supply_summary(view.supply)
+
+
+def render_board_full(visible_offers):
+    # Formatting for display
+    display_df = in_dollars(visible_offers, {"Cents": "Price"})[['Status', 'Price', 'Volume', 'Term', 'User']]
+    
+    # Apply color coding to Status
+    def color_status(val):
+        color = '#2ECC71' if val == 'Accepted' else '#F39C12'
+        return f'color: {color}; font-weight: bold'
+
+    st.dataframe(
+        display_df.style
+        .map(color_status, subset=['Status'])
+        .format({"Price": "${:+.2f}", "Volume": "{:,}"}),
+        width='stretch'
+    )
+
+
+def render_board_lite(visible_offers):
+    # Plain (unstyled) board, pre-formatted as text
+    display_df = pd.DataFrame({
+        "Status": visible_offers["Status"],
+        "Price": visible_offers["Cents"].map(fmt_cents),
+        "Volume": visible_offers["Volume"].map("{:,}".format),
+        "Term": visible_offers["Term"],
+        "User": visible_offers["User"],
+    })
+    st.dataframe(display_df, hide_index=True, width='stretch')
+
+
+# --- SERVER-SIDE PAGING & FILTERS ---
+# Boards and the admin queue are filtered and paged in SQL, so the browser
+# only receives one page. The admin queue is a single grid widget holding at
+# most ADMIN_PAGE_SIZE rows per location.
+BOARD_PAGE_SIZE = 50
+ADMIN_PAGE_SIZE = 200
+
+def paged_query(key, loc, page_size, **filters):
+    # The page number comes from the pager widget drawn under the results
+    page = st.session_state.get(key, 1)
+    page_df, total = store.query_offers(loc, limit=page_size, offset=(page - 1) * page_size, **filters)
+    n_pages = max(1, -(-total // page_size))
+    if page > n_pages:
+        # Filters shrank the result set: jump back to the last page
+        st.session_state[key] = page = n_pages
+        page_df, total = store.query_offers(loc, limit=page_size, offset=(page - 1) * page_size, **filters)
+    return page_df, total, n_pages
+
+
+def page_selector(key, n_pages):
+    if n_pages > 1:
+        st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, key=key)
+
+
+def board_filters(i, loc):
+    with st.expander("🔎 Filter / Search"):
+        f_col1, f_col2 = st.columns(2)
+        with f_col1:
+            min_price = st.number_input("Min Diff ($)", value=None, step=0.05, key=f"f_min_{i}")
+        with f_col2:
+            max_price = st.number_input("Max Diff ($)", value=None, step=0.05, key=f"f_max_{i}")
+
+        f_col3, f_col4, f_col5 = st.columns(3)
+        with f_col3:
+            seller = st.text_input("Seller (starts with)", key=f"f_seller_{i}")
+        with f_col4:
+            terms = st.multiselect("Term", store.terms(loc), key=f"f_term_{i}")
+        with f_col5:
+            statuses = st.multiselect("Status", LIVE_STATUSES, default=LIVE_STATUSES, key=f"f_status_{i}")
+
+    return {
+        "min_cents": None if min_price is None else to_cents(min_price),
+        "max_cents": None if max_price is None else to_cents(max_price),
+        "seller": seller.strip() or None,
+        "terms": terms,
+        "statuses": statuses or LIVE_STATUSES,
+    }
 
-# Convert list to DataFrame
-df = pd.DataFrame(st.session_state.auction_data)
 
-# Create tabs for locations
-tabs = st.tabs(locations)
+# --- SHARED VIEW MODELS ---
+# Everything a read-only viewer sees of a location (capacity, banner, the
+# unfiltered first page of the board, figures) depends only on the book
+# version, so it is built once per version per process and every session
+# draws from the same copy (see gfo_views.py). Filtered or later pages still
+# go to SQL per session. The Plotly figures are a separate entry, built only
+# when a full-mode page asks for them, so lite mode never touches Plotly.
+LocationView = namedtuple(
+    "LocationView", "capacity accepted remaining pct_full banner supply offers n_offers"
+)
+LocationFigures = namedtuple("LocationFigures", "gauge supply")
+
+def build_location_view(loc):
+    capacity = auction.capacities[loc]
+    accepted_vol = store.accepted_volume(loc)
+    pct_full = min(accepted_vol / capacity, 1.0)
+    supply = store.supply_stats(loc, capacity)
+    offers, n_offers = store.query_offers(loc, limit=max(BOARD_PAGE_SIZE, LITE_PAGE_SIZE))
+    return LocationView(
+        capacity, accepted_vol, capacity - accepted_vol, pct_full, banner(pct_full), supply, offers, n_offers,
+    )
+
+
+def location_view(loc):
+    # Keyed by the version this run's snapshot reads, so the view matches it
+    return views.get((st.session_state.book_version, loc), lambda: build_location_view(loc))
+
+
+def location_figures(loc, view):
+    return views.get(
+        (st.session_state.book_version, loc, "figures"),
+        lambda: LocationFigures(gauge_figure(view.accepted, view.capacity), supply_figure(loc, view.capacity, view.supply)),
+    )
+
+
+def unfiltered(filters):
+    return (filters["min_cents"] is None and filters["max_cents"] is None and filters["seller"] is None
+            and not filters["terms"] and set(filters["statuses"]) == set(LIVE_STATUSES))
+
+
+def board_page(key, loc, view, page_size, filters):
+    # The unfiltered first page is what nearly every viewer sees: take it from the shared view
+    if unfiltered(filters) and st.session_state.get(key, 1) == 1:
+        return view.offers.head(page_size), view.n_offers, max(1, -(-view.n_offers // page_size))
+    return paged_query(key, loc, page_size, **filters)
+
+
+# --- ADMIN: BATCH DECISION GRID ---
+# The admin marks a whole page of pending offers Accept / Reject in one grid.
+# Edits stay in the browser until "Commit", then every decision is applied in
+# one store transaction (one capacity check per location) and one rerun.
+# The grid works off a frozen list of offer IDs so rows never shift under
+# the admin's edits when new offers arrive; it refreshes after each commit.
+DECISIONS = {"Accept": "Accepted", "Reject": "Rejected"}
+
+def admin_worklist(i, loc):
+    worklist = st.session_state.get(f"worklist_{i}")
+    page = st.session_state.get(f"admin_page_{i}", 1)
+    if worklist is None or worklist["page"] != page:
+        pending, n_pending, n_pages = paged_query(f"admin_page_{i}", loc, ADMIN_PAGE_SIZE, statuses=("Pending",))
+        st.session_state.worklist_gen = st.session_state.get("worklist_gen", 0) + 1
+        worklist = st.session_state[f"worklist_{i}"] = {
+            "page": st.session_state.get(f"admin_page_{i}", 1),
+            "ids": [int(x) for x in pending["ID"]],
+            "n_pending": n_pending,
+            "n_pages": n_pages,
+            "gen": st.session_state.worklist_gen,
+        }
+    return worklist
+
+
+def render_decision_grid(i, loc):
+    if st.button("🔄 Refresh queue", key=f"refresh_{i}"):
+        st.session_state.pop(f"worklist_{i}", None)
+    worklist = admin_worklist(i, loc)
+
+    if not worklist["ids"]:
+        st.write("No pending offers.")
+        return
+
+    # Decisions apply only to offers still at the version the admin was shown
+    shown = st.session_state.get(f"grid_shown_{i}", {})
+    grid = in_dollars(store.offers_by_ids(worklist["ids"]), {"Cents": "Price"})
+    st.session_state[f"grid_shown_{i}"] = dict(zip(grid["ID"].tolist(), grid["Version"].tolist()))
+    grid.insert(0, "Decision", None)
+    st.caption(f"{worklist['n_pending']:,} pending · mark offers below, then commit once")
+
+    with st.form(f"decisions_form_{i}"):
+        edited = st.data_editor(
+            grid[["Decision", "ID", "User", "Price", "Volume", "Term", "Status", "Version"]],
+            hide_index=True,
+            disabled=["ID", "User", "Price", "Volume", "Term", "Status", "Version"],
+            column_config={
+                "Decision": st.column_config.SelectboxColumn("Decision", options=list(DECISIONS)),
+                "Price": st.column_config.NumberColumn("Price", format="$%.2f"),
+                "Volume": st.column_config.NumberColumn("Volume", format="%d bbl"),
+            },
+            key=f"grid_{i}_{worklist['gen']}",
+            width='stretch'
+        )
+        b_col1, b_col2, b_col3 = st.columns(3)
+        with b_col1:
+            commit = st.form_submit_button("💾 Commit decisions", type="primary", width='stretch')
+        with b_col2:
+            accept_all = st.form_submit_button("✅ Accept all shown", width='stretch')
+        with b_col3:
+            reject_all = st.form_submit_button("❌ Reject all shown", width='stretch')
+
+    if not (commit or accept_all or reject_all):
+        page_selector(f"admin_page_{i}", worklist["n_pages"])
+        return
+
+    live = edited[edited["Status"] == "Pending"]
+    if accept_all or reject_all:
+        decision = "Accepted" if accept_all else "Rejected"
+        decisions = {int(x): decision for x in live["ID"]}
+    else:
+        marked = live[live["Decision"].isin(list(DECISIONS))]
+        decisions = {int(x): DECISIONS[d] for x, d in zip(marked["ID"], marked["Decision"])}
+
+    if not decisions:
+        st.warning("No decisions marked.")
+        return
+    try:
+        applied, skipped = store.apply_decisions(decisions, auction.capacities, versions=shown)
+    except CapacityError as e:
+        st.error(f"Not enough capacity! {e}")
+        return
+
+    st.session_state.pop(f"worklist_{i}", None)
+    note = f"✅ {applied:,} decision(s) committed"
+    if skipped:
+        note += f" · {skipped:,} skipped (no longer pending, or amended since shown)"
+    st.session_state.admin_notice = note
+    st.rerun()
+
+
+def render_location(i, loc):
+    view = location_view(loc)
+
+    if lite_mode:
+        render_capacity_lite(view)
+    else:
+        render_capacity_full(i, loc, view)
+        render_fill_history(i, loc, view.capacity)
+
+    st.divider()
+
+    # --- ADMIN VIEW: MANAGE OFFERS ---
+    if admin_mode:
+        st.subheader("🛡️ Admin: Pending Offers")
+        render_decision_grid(i, loc)
+        st.divider()
 
-for i, loc in enumerate(locations):
-    with tabs[i]:
-        # Filter data for this location
-        loc_data = df[df['Location'] == loc]
-        
-        # Calculate Capacity
-        accepted_vol = loc_data[loc_data['Status'] == "Accepted"]['Volume'].sum()
-        remaining = MAX_VOLUME - accepted_vol
-        pct_full = min(accepted_vol / MAX_VOLUME, 1.0)
-        
-        # --- GAUGE VISUALIZER ---
-        g_col1, g_col2 = st.columns([1, 1])
-        
-        with g_col1:
-            # Create the Gauge Chart
-            fig = go.Figure(go.Indicator(
-                mode = "gauge+number",
-                value = accepted_vol,
-                domain = {'x': [0, 1], 'y': [0, 1]},
-                title = {'text': "<b>Filled Capacity</b><br><span style='font-size:0.8em;color:gray'>Barrels per Day</span>"},
-                gauge = {
-                    'axis': {'range': [None, MAX_VOLUME], 'tickwidth': 1, 'tickcolor': "white"},
-                    'bar': {'color': "#4b9fff"}, 
-                    'bgcolor': "#262730",
-                    'borderwidth': 2,
-                    'bordercolor': "#464B5C",
-                    'steps': [
-                        {'range': [0, MAX_VOLUME], 'color': "#262730"}
-                    ],
-                    'threshold': {
-                        'line': {'color': "red", 'width': 4},
-                        'thickness': 0.75,
-                        'value': MAX_VOLUME
-                    }
-                }
+    # --- PUBLIC VIEW: AUCTION BOARD ---
+    st.subheader("Live Auction Board")
+    
+    filters = board_filters(i, loc)
+    page_size = LITE_PAGE_SIZE if lite_mode else BOARD_PAGE_SIZE
+    visible_offers, n_visible, n_pages = board_page(f"board_page_{i}", loc, view, page_size, filters)
+    
+    if not visible_offers.empty:
+        if lite_mode:
+            render_board_lite(visible_offers)
+        else:
+            render_board_full(visible_offers)
+        page_selector(f"board_page_{i}", n_pages)
+    else:
+        st.caption("No active offers on the block.")
+
+
+# --- ADMIN: WHAT-IF SIMULATOR ---
+# Sweeps a grid of capacity x price-floor scenarios over the pending book for
+# every terminal in one NumPy pass (see gfo_simulator.py).
+# The sweep is cached per book version and grid, so widget interactions that
+# only change the view (terminal, metric, drill-down) do not re-run it, and
+# the grid is capped so a wide sweep cannot monopolize the shared worker.
+SIM_METRICS = {
+    "Clearing diff ($)": "Clearing",
+    "Accepted volume (bbl)": "Accepted Volume",
+    "Accepted offers": "Accepted Offers",
+}
+SIM_MAX_SCENARIOS = 10000
+
+@st.cache_data(max_entries=8, show_spinner="Running scenarios...")
+def run_sweep(path, version, locations, capacities, floors, _store):
+    book = _store.pending_book()
+    accepted = {loc: _store.accepted_volume(loc) for loc in locations}
+    t0 = time.perf_counter()
+    results = simulate_clearing(book, accepted, capacities, floors)
+    return book, accepted, results, (time.perf_counter() - t0) * 1000
+
+def render_simulator():
+    with st.expander("🧪 What-if Clearing Simulator"):
+        if not st.toggle("Run simulator", key="sim_on"):
+            st.caption("Clears the pending book under many capacity / price-floor scenarios at once.")
+            return
+
+        s_col1, s_col2, s_col3 = st.columns(3)
+        with s_col1:
+            cap_lo, cap_hi = st.slider("Capacity range (bpd)", 0, 100000, (10000, 50000), step=1000, key="sim_caps")
+            cap_step = st.number_input("Capacity step", min_value=500, value=2500, step=500, key="sim_cap_step")
+        with s_col2:
+            floor_lo, floor_hi = st.slider("Price floor range ($)", -20.0, 20.0, (-6.0, 4.0), step=0.25, key="sim_floors")
+            floor_step = st.number_input("Floor step ($)", min_value=0.05, value=0.25, step=0.05, key="sim_floor_step")
+        with s_col3:
+            sim_loc = st.selectbox("Terminal", locations, key="sim_loc")
+            metric = st.selectbox("Show", list(SIM_METRICS), key="sim_metric")
+
+        capacities = np.arange(cap_lo, cap_hi + 1, cap_step)
+        floors = np.arange(to_cents(floor_lo), to_cents(floor_hi) + 1, to_cents(floor_step))
+        if len(capacities) * len(floors) > SIM_MAX_SCENARIOS:
+            st.warning(
+                f"{len(capacities) * len(floors):,} scenarios is too many (limit {SIM_MAX_SCENARIOS:,}). "
+                "Narrow the ranges or use larger steps."
+            )
+            return
+
+        book, accepted, results, elapsed_ms = run_sweep(
+            auction.book_path, st.session_state.book_version, tuple(locations),
+            tuple(capacities.tolist()), tuple(floors.tolist()), store,
+        )
+        st.caption(
+            f"{len(capacities) * len(floors):,} scenarios × {len(locations)} terminals over "
+            f"{len(book):,} pending offers in {elapsed_ms:.0f} ms"
+        )
+
+        grid = results[results["Location"] == sim_loc].pivot(index="Floor", columns="Capacity", values=SIM_METRICS[metric])
+        grid.index = grid.index / 100
+        if SIM_METRICS[metric] == "Clearing":
+            grid = grid.astype("Float64") / 100
+        if lite_mode:
+            st.dataframe(grid, width='stretch')
+        else:
+            fig = go.Figure(go.Heatmap(
+                z=grid.to_numpy(dtype=float, na_value=np.nan), x=grid.columns, y=grid.index, colorscale="Viridis",
+                hovertemplate="capacity %{x:,} · floor $%{y:+.2f}<br>%{z}<extra></extra>"
             ))
-            
+            fig.add_vline(x=auction.capacities[sim_loc], line={'color': "red", 'dash': "dash"})
             fig.update_layout(
                 paper_bgcolor="rgba(0,0,0,0)",
                 font={'color': "white", 'family': "Arial"},
-                margin=dict(l=30, r=30, t=50, b=10),
-                height=250
+                margin=dict(l=30, r=30, t=30, b=10),
+                xaxis={'title': "Capacity (bpd)"},
+                yaxis={'title': "Price floor ($)"},
+                height=400
             )
-            # FIXED LINE BELOW: Added key=f"gauge_{i}"
-            st.plotly_chart(fig, use_container_width=True, key=f"gauge_{i}")
-
-        with g_col2:
-            st.write("### Space Remaining")
-            st.markdown(f"""
-            <div style="border: 1px solid #464B5C; border-radius: 10px; padding: 20px; text-align: center; background-color: #262730;">
-                <h2 style="color: #2ECC71; margin:0;">{remaining:,}</h2>
-                <p style="color: #FAFAFA; margin:0;">Barrels Available</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.write("") # Spacer
-            if pct_full >= 1.0:
-                st.error("⛔ LOCATION FULL")
-            elif pct_full >= 0.8:
-                st.warning("⚠️ NEAR CAPACITY")
-            else:
-                st.success("✅ OPEN FOR BIDS")
-
-        st.divider()
-
-        # --- ADMIN VIEW: MANAGE OFFERS ---
-        if admin_mode:
-            st.subheader("🛡️ Admin: Pending Offers")
-            pending = loc_data[loc_data['Status'] == "Pending"]
-            
-            if not pending.empty:
-                for index, row in pending.iterrows():
-                    c_info, c_act = st.columns([3, 1])
-                    with c_info:
-                        st.info(f"**{row['User']}** offers **{row['Volume']} bpd** @ **${row['Price']:.2f}** ({row['Term']})")
-                    with c_act:
-                        # Find the actual index in the main list to update
-                        real_idx = next((i for i, d in enumerate(st.session_state.auction_data) if d["ID"] == row["ID"]), None)
-                        
-                        col_acc, col_rej = st.columns(2)
-                        if col_acc.button("✅", key=f"acc_{row['ID']}"):
-                            if remaining >= row['Volume']:
-                                st.session_state.auction_data[real_idx]['Status'] = "Accepted"
-                                st.rerun()
-                            else:
-                                st.error("Not enough capacity!")
-                                
-                        if col_rej.button("❌", key=f"rej_{row['ID']}"):
-                            st.session_state.auction_data[real_idx]['Status'] = "Rejected"
-                            st.rerun()
-            else:
-                st.write("No pending offers.")
-            st.divider()
-
-        # --- PUBLIC VIEW: AUCTION BOARD ---
-        st.subheader("Live Auction Board")
-        
-        visible_offers = loc_data[loc_data['Status'].isin(["Pending", "Accepted"])].sort_values(by="Price")
-        
-        if not visible_offers.empty:
-            # Formatting for display
-            display_df = visible_offers[['Status', 'Price', 'Volume', 'Term', 'User']].copy()
-            
-            # Apply color coding to Status
-            def color_status(val):
-                color = '#2ECC71' if val == 'Accepted' else '#F39C12'
-                return f'color: {color}; font-weight: bold'
-
-            st.dataframe(
-                display_df.style
-                .map(color_status, subset=['Status'])
-                .format({"Price": "${:+.2f}", "Volume": "{:,}"}),
+            st.plotly_chart(fig, width='stretch', key="sim_heatmap")
+
+        # Drill into one scenario to see which sellers get in
+        d_col1, d_col2 = st.columns(2)
+        with d_col1:
+            pick_cap = st.selectbox("Scenario capacity", capacities, index=int(np.abs(capacities - auction.capacities[sim_loc]).argmin()), key="sim_pick_cap")
+        with d_col2:
+            pick_floor = st.selectbox("Scenario floor", floors, index=0, format_func=fmt_cents, key="sim_pick_floor")
+        taken = cleared_offers(book[book["Location"] == sim_loc], accepted[sim_loc], pick_cap, pick_floor)
+        st.dataframe(in_dollars(taken, {"Cents": "Price"})[["ID", "User", "Price", "Volume", "Term"]], hide_index=True, width='stretch')
+
+
+# --- ADMIN: AUCTION ROUNDS ---
+# New rounds get their own book and archive next to the registry. Dates are
+# whole UTC days; a round closes at the end of its closing day.
+def day_start(day):
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+
+def render_round_admin():
+    with st.expander("🗓️ Auction Rounds"):
+        st.caption(f"**{auction.name}**: {auction.window()} · {len(locations)} terminals")
+        if auction.is_open() and st.button("Close submissions now", key="round_close"):
+            registry.close(auction.id)
+            st.session_state.admin_notice = f"{auction.name} is closed to new offers."
+            st.rerun()
+
+        st.write("#### New round")
+        with st.form("round_form"):
+            name = st.text_input("Name", placeholder="e.g. December 2026")
+            r_col1, r_col2 = st.columns(2)
+            with r_col1:
+                opens = st.date_input("Opens (UTC)", value=None)
+            with r_col2:
+                closes = st.date_input("Closes (UTC, end of day)", value=None)
+            terminals = st.data_editor(
+                pd.DataFrame({"Location": locations, "Capacity": [auction.capacities[loc] for loc in locations]}),
+                num_rows="dynamic",
+                hide_index=True,
+                column_config={"Capacity": st.column_config.NumberColumn("Capacity (bpd)", min_value=1, step=1000)},
                 width='stretch'
             )
+            if not st.form_submit_button("Create round"):
+                return
+
+        name = name.strip()
+        terminals = terminals.dropna()
+        capacities = {str(t.Location).strip(): int(t.Capacity) for t in terminals.itertuples() if str(t.Location).strip()}
+        opens_at = day_start(opens) if opens else None
+        closes_at = day_start(closes + timedelta(days=1)) if closes else None
+        if not name:
+            st.error("Name required.")
+        elif any(a.name == name for a in auctions.values()):
+            st.error(f"There is already a round called {name}.")
+        elif not capacities:
+            st.error("A round needs at least one terminal.")
+        elif opens_at and closes_at and closes_at <= opens_at:
+            st.error("A round must close after it opens.")
         else:
-            st.caption("No active offers on the block.")
+            new_round = registry.create(name, capacities, opens_at, closes_at)
+            st.session_state.switch_round = new_round.id
+            st.session_state.admin_notice = f"{new_round.name} created."
+            st.rerun()
+
+
+# --- ADMIN: TOP SELLERS ---
+TOP_SELLERS = 10
+
+def render_top_sellers():
+    with st.expander("🏆 Top Sellers"):
+        rank_by = st.radio("Rank by", ["Accepted", "Offered"], horizontal=True, key="top_by")
+        st.dataframe(
+            in_dollars(store.top_sellers(TOP_SELLERS, by=f"{rank_by.lower()}_volume"), {"Avg Cents": "Avg Diff"}),
+            hide_index=True,
+            column_config={"Avg Diff": st.column_config.NumberColumn(format="$%.2f")},
+            width='stretch'
+        )
+
+
+# --- ADMIN: COLD ARCHIVE ---
+# Terminal offers live in Parquet, out of the hot book; load them on demand.
+ARCHIVE_PREVIEW_ROWS = 1000
+
+def render_archive_browser():
+    with st.expander("🗄️ Archived Offers"):
+        a_col1, a_col2, a_col3 = st.columns(3)
+        with a_col1:
+            arc_loc = st.selectbox("Terminal", ["All"] + locations, key="arc_loc")
+        arc_loc = None if arc_loc == "All" else arc_loc
+        with a_col2:
+            arc_month = st.selectbox("Month", ["All"] + store.archive.months(arc_loc), key="arc_month")
+        arc_month = None if arc_month == "All" else arc_month
+        with a_col3:
+            arc_status = st.multiselect("Status", TERMINAL_STATUSES, key="arc_status")
+
+        if st.button("Load archived offers", key="arc_load"):
+            # Only the preview rows are read; the total comes from file metadata
+            archived = store.archive.query(arc_loc, arc_month, arc_status, limit=ARCHIVE_PREVIEW_ROWS)
+            total = store.archive.count(arc_loc, arc_status, month=arc_month)
+            st.caption(f"{total:,} archived offers" + (
+                f" · showing first {ARCHIVE_PREVIEW_ROWS:,}" if total > ARCHIVE_PREVIEW_ROWS else ""
+            ))
+            st.dataframe(
+                pd.DataFrame({
+                    "ID": archived["id"],
+                    "Location": archived["location"],
+                    "Month": archived["month"],
+                    "Status": archived["status"],
+                    "Price": archived["price"],
+                    "Volume": archived["volume"],
+                    "Term": archived["term"],
+                    "User": archived["user"],
+                }),
+                hide_index=True,
+                width='stretch'
+            )
+        st.caption(f"Hot book: {store.terminal_count():,} terminal offers awaiting archive")
+
+
+# --- ADMIN: EXPORT (SIDEBAR) ---
+# The file is built only when Download is clicked, on Streamlit's download
+# thread rather than in the page script, streaming chunks from the archive and
+# the hot book into a temp file (see gfo_export.py). Streamlit then holds the
+# finished bytes in the worker's memory to serve them, so browser downloads are
+# capped at EXPORT_UI_MAX_ROWS; bigger exports go through the CLI, which
+# streams straight to disk.
+EXPORT_CHOICES = [f for f in EXPORT_FORMATS if f != "xlsx" or importlib.util.find_spec("openpyxl")]
+EXPORT_UI_MAX_ROWS = 200_000
+
+def render_export_panel():
+    st.sidebar.divider()
+    st.sidebar.subheader("📤 Export Book")
+    exp_fmt = st.sidebar.selectbox("Format", EXPORT_CHOICES, key="exp_fmt")
+    exp_loc = st.sidebar.selectbox("Location", ["All"] + locations, key="exp_loc")
+    exp_status = st.sidebar.multiselect("Status", LIVE_STATUSES + TERMINAL_STATUSES, key="exp_status")
+    exp_dates = st.sidebar.date_input("Submitted between", value=(), key="exp_dates")
+
+    if "xlsx" not in EXPORT_CHOICES:
+        st.sidebar.caption("XLSX needs openpyxl (pip install -r requirements.txt).")
+
+    location = None if exp_loc == "All" else exp_loc
+    since = exp_dates[0] if len(exp_dates) > 0 else None
+    until = exp_dates[1] + timedelta(days=1) if len(exp_dates) > 1 else None
+
+    # Size the export once per choice of filters, not on every rerun
+    chosen = (auction.id, location, tuple(exp_status), since, until)
+    if st.sidebar.button("📦 Prepare export", key="exp_prepare", width='stretch'):
+        st.session_state.exp_prepared = (chosen, count_export_rows(store, location, exp_status, since, until))
+    prepared = st.session_state.get("exp_prepared")
+    if prepared is None or prepared[0] != chosen:
+        return
+    n_rows = prepared[1]
+    if n_rows > EXPORT_UI_MAX_ROWS:
+        st.sidebar.warning(f"About {n_rows:,} offers: too many to download here (limit {EXPORT_UI_MAX_ROWS:,}). Use the CLI:")
+        args = [f"--auction {auction.id}", f"-f {exp_fmt}"]
+        args += [f'--location "{location}"'] if location else []
+        args += [f"--status {s}" for s in exp_status]
+        args += [f"--since {since}"] if since else []
+        args += [f"--until {until}"] if until else []
+        st.sidebar.code(f"python gfo_export.py {' '.join(args)} -o export.{exp_fmt}", language="bash")
+        return
+    st.sidebar.caption(f"About {n_rows:,} offers")
+
+    def build_export():
+        return export_bytes(store, exp_fmt, location, exp_status, since, until)
+
+    st.sidebar.download_button(
+        "⬇️ Download",
+        data=build_export,
+        file_name=f"gfo-round{auction.id}-{datetime.now(timezone.utc):%Y%m%d-%H%M}.{exp_fmt}",
+        mime=EXPORT_FORMATS[exp_fmt],
+        on_click="ignore",
+        key="exp_download",
+        width='stretch'
+    )
+
+
+# --- ADMIN: RENDER CACHE (SIDEBAR) ---
+# How well the shared view models are working in this process: lookups
+# served from the cache vs built, and the memory the cached views hold.
+def render_cache_stats():
+    stats = views.stats()
+    st.sidebar.divider()
+    st.sidebar.subheader("🧮 Render Cache")
+    c_col1, c_col2 = st.sidebar.columns(2)
+    c_col1.metric("Hit rate", "—" if stats["hit_rate"] is None else f"{stats['hit_rate']:.0%}")
+    c_col2.metric("Memory", f"{stats['bytes'] / 1024:,.0f} KB")
+    st.sidebar.caption(
+        f"{stats['hits']:,} hits · {stats['misses']:,} builds · "
+        f"{stats['entries']} views cached · {stats['evictions']:,} evicted"
+    )
+
+
+# --- LIVE UPDATES ---
+# Every worker process shares the one book file. Writes from any process bump
+# the store's version counter; this fragment polls that single number and
+# redraws the page only when it moves. The owner view refreshes on demand so
+# a rerun never lands in the middle of a decision batch.
+LIVE_REFRESH_SECONDS = 3
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def watch_book():
+    if store.version() != st.session_state.book_version:
+        st.rerun()
+
+
+# Capacity alerts come from the process-wide alert bus, not the book, so
+# watching them costs nothing however many pages are open.
+ALERT_ICONS = {"FULL": "⛔", "NEAR CAPACITY": "⚠️"}
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def watch_alerts():
+    if "alerts_seen" not in st.session_state:
+        st.session_state.alerts_seen = alert_bus.last_id
+    for alert in alert_bus.since(st.session_state.alerts_seen):
+        st.toast(f"{alert.location}: {alert.level} ({alert.filled:,} / {alert.capacity:,} bbl)",
+                 icon=ALERT_ICONS[alert.level])
+        st.session_state.alerts_seen = alert.id
+
+
+# --- MAIN DASHBOARD ---
+# Drawn from one snapshot of the book, so every gauge, board and the version
+# recorded for live updates agree with each other, even while others write.
+with store.snapshot():
+    st.session_state.book_version = store.version()
+
+    st.title("🛢️ GFO Auction Block")
+    st.markdown("### Sell your crude before the capacity fills up!")
+    st.caption(f"🗓️ **{auction.name}** · {auction.window()}")
+    st.divider()
+
+    if admin_mode:
+        render_export_panel()
+        render_cache_stats()
+        render_round_admin()
+        render_top_sellers()
+        render_simulator()
+        render_archive_browser()
+
+    if lite_mode:
+        # One location per rerun: hidden tabs would still ship their content
+        i = st.selectbox("Terminal", range(len(locations)), format_func=lambda k: locations[k], key="lite_location")
+        render_location(i, locations[i])
+    else:
+        # Create tabs for locations
+        tabs = st.tabs(locations)
+
+        for i, loc in enumerate(locations):
+            with tabs[i]:
+                render_location(i, loc)
+
+watch_alerts()
+if not admin_mode:
+    watch_book()
 
 
 # ############################## OLD STYLE ##################################
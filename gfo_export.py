@@ -0,0 +1,187 @@
+# --- BOOK EXPORT ---
+# Streams offers from the cold archive and the hot book, chunk by chunk, into
+# CSV, Parquet or XLSX for settlement and accounting. Only one chunk is ever
+# held in memory. Used by the owner view's export panel and as a CLI:
+#
+#   python gfo_export.py -f csv -o book.csv
+#   python gfo_export.py -f parquet --location "Vernal, Utah" --status Accepted \
+#       --since 2026-10-01 --until 2026-11-01 -o vernal-oct.parquet
+#   python gfo_export.py --auction 2 -o round2.csv      # another round's book
+#
+# XLSX needs openpyxl (pip install openpyxl).
+import argparse
+import csv
+import io
+import os
+import tempfile
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from gfo_archive import ColdArchive, SeenIds
+from gfo_auctions import AuctionRegistry
+from gfo_store import OfferStore
+
+EXPORT_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet",
+                  "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}
+EXPORT_COLUMNS = ["ID", "Location", "Price", "Volume", "Term", "User", "Status", "Created", "Updated"]
+EXPORT_SCHEMA = pa.schema([
+    ("ID", pa.int64()),
+    ("Location", pa.string()),
+    ("Price", pa.decimal128(12, 2)),
+    ("Volume", pa.int64()),
+    ("Term", pa.string()),
+    ("User", pa.string()),
+    ("Status", pa.string()),
+    ("Created", pa.timestamp("s", tz="UTC")),
+    ("Updated", pa.timestamp("s", tz="UTC")),
+])
+CHUNK_ROWS = 5000
+
+
+def _epoch(day):
+    # Date filters are whole UTC days
+    if day is None:
+        return None
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+
+
+def iter_export_rows(store, location=None, statuses=None, since=None, until=None, chunksize=CHUNK_ROWS):
+    """Offers matching the filters as lists of row tuples in EXPORT_COLUMNS
+    order, prices in integer cents: archived offers first, then the hot
+    book. `since` / `until` are dates (until exclusive). Each offer is
+    exported once, even if a crash left it in two archive files or in both
+    tiers."""
+    since, until = _epoch(since), _epoch(until)
+    seen = SeenIds()
+    if store.archive is not None:
+        for batch in store.archive.iter_batches(location, statuses, since, until, batch_size=chunksize, seen=seen):
+            cols = batch.to_pydict()
+            # The archive keeps dollars; back to cents so both tiers agree
+            cents = [round(p * 100) for p in cols["price"]]
+            yield list(zip(
+                cols["id"], cols["location"], cents, cols["volume"], cols["term"],
+                cols["user"], cols["status"], cols["created_at"], cols["updated_at"],
+            ))
+    for rows in store.iter_offers(location, statuses, since, until, chunksize=chunksize):
+        fresh = seen.first_time([r[0] for r in rows])
+        if not fresh.all():
+            rows = [r for r, keep in zip(rows, fresh) if keep]
+        if rows:
+            yield rows
+
+
+def count_export_rows(store, location=None, statuses=None, since=None, until=None):
+    """About how many rows export_offers would write (archive duplicates
+    are counted), without reading the rows themselves."""
+    since, until = _epoch(since), _epoch(until)
+    archived = store.archive.count(location, statuses, since, until) if store.archive is not None else 0
+    return archived + store.count_offers(location, statuses, since, until)
+
+
+def _dollars(cents):
+    # Exact: cents -> Decimal("12.34"), never via a float
+    return Decimal(cents).scaleb(-2)
+
+
+def _stamp(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(microsecond=0)
+
+
+def _write_csv(chunks, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_COLUMNS)
+    n = 0
+    for rows in chunks:
+        writer.writerows(
+            r[:2] + (_dollars(r[2]),) + r[3:7] + (_stamp(r[7]).isoformat(), _stamp(r[8]).isoformat()) for r in rows
+        )
+        n += len(rows)
+    text.detach()
+    return n
+
+
+def _write_parquet(chunks, out):
+    n = 0
+    with pq.ParquetWriter(out, EXPORT_SCHEMA, compression="zstd") as writer:
+        for rows in chunks:
+            cols = list(zip(*rows))
+            cols[2] = [_dollars(c) for c in cols[2]]
+            cols[7] = [int(ts) for ts in cols[7]]
+            cols[8] = [int(ts) for ts in cols[8]]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(c, type=f.type) for c, f in zip(cols, EXPORT_SCHEMA)], schema=EXPORT_SCHEMA
+            ))
+            n += len(rows)
+    return n
+
+
+def _write_xlsx(chunks, out):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("XLSX export needs openpyxl (pip install openpyxl)") from None
+    # write_only mode streams rows to disk instead of building the sheet in memory
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet("Offers")
+    sheet.append(EXPORT_COLUMNS)
+    n = 0
+    for rows in chunks:
+        for r in rows:
+            sheet.append(list(r[:2]) + [_dollars(r[2])] + list(r[3:7])
+                         + [_stamp(r[7]).replace(tzinfo=None), _stamp(r[8]).replace(tzinfo=None)])
+        n += len(rows)
+    book.save(out)
+    return n
+
+
+WRITERS = {"csv": _write_csv, "parquet": _write_parquet, "xlsx": _write_xlsx}
+
+
+def export_offers(store, out, fmt, location=None, statuses=None, since=None, until=None):
+    """Stream matching offers into `out` (a binary file object) as `fmt`.
+    Returns the number of offers written."""
+    chunks = iter_export_rows(store, location, statuses, since, until)
+    return WRITERS[fmt](chunks, out)
+
+
+def export_bytes(store, fmt, location=None, statuses=None, since=None, until=None):
+    """The finished export as bytes, for a browser download (Streamlit
+    accepts bytes, not an open temp file). Chunks are written to a temp
+    file first, so only the finished file is ever held in memory."""
+    with tempfile.TemporaryFile() as out:
+        export_offers(store, out, fmt, location, statuses, since, until)
+        out.seek(0)
+        return out.read()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the auction book to CSV, Parquet or XLSX.")
+    parser.add_argument("-f", "--format", choices=list(WRITERS), default="csv")
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--location")
+    parser.add_argument("--status", action="append", help="repeat for several statuses")
+    parser.add_argument("--since", type=date.fromisoformat, help="YYYY-MM-DD, submitted on or after")
+    parser.add_argument("--until", type=date.fromisoformat, help="YYYY-MM-DD, submitted before")
+    parser.add_argument("--db", default=os.environ.get("GFO_DB_PATH", "gfo_auction.db"))
+    parser.add_argument("--archive", default=os.environ.get("GFO_ARCHIVE_DIR", "gfo_archive"))
+    parser.add_argument("--auction", type=int, help="round ID: export that round's book and archive instead")
+    parser.add_argument("--auctions", default=os.environ.get("GFO_AUCTIONS_PATH", "gfo_auctions.db"))
+    args = parser.parse_args()
+
+    if args.auction is not None:
+        auction = AuctionRegistry(args.auctions).get(args.auction)
+        if auction is None:
+            raise SystemExit(f"no auction round {args.auction} in {args.auctions}")
+        args.db, args.archive = auction.book_path, auction.archive_dir
+    store = OfferStore(args.db, ColdArchive(args.archive))
+    try:
+        with open(args.output, "wb") as out:
+            n = export_offers(store, out, args.format, args.location, args.status, args.since, args.until)
+    except RuntimeError as e:
+        os.remove(args.output)
+        raise SystemExit(str(e))
+    print(f"wrote {n:,} offers to {args.output}")
@@ -0,0 +1,95 @@
+# --- WHAT-IF CLEARING SIMULATOR ---
+# Clears the current pending book under a grid of capacity and price-floor
+# scenarios for every location at once, in one vectorized NumPy pass.
+#
+# Clearing rule (same as the board): offers at or above the floor are taken
+# cheapest differential first until the terminal's capacity, less what is
+# already accepted, is used up. The clearing differential is the price of
+# the last (marginal) offer taken. Prices and floors are integer cents and
+# volumes integer barrels, so every sum and comparison is exact int64.
+#
+# The working arrays are (capacities x floors x offers), so the sweep runs
+# in blocks of floors and capacities holding at most SIM_BLOCK_CELLS cells
+# each: memory stays bounded (a few hundred MB at worst) whatever the grid
+# or book size, and only the running time grows.
+import numpy as np
+import pandas as pd
+
+SIM_BLOCK_CELLS = 4_000_000  # (capacity, floor, offer) cells per block
+
+
+def simulate_clearing(book, accepted, capacities, floors):
+    """Evaluate every (capacity, floor) pair for every location.
+
+    book: pending offers with Location, Cents, Volume columns.
+    accepted: {location: volume already accepted}.
+    floors: price floors in cents.
+    Returns a long DataFrame with one row per location and scenario:
+    Location, Capacity, Floor, Clearing, Accepted Volume, Accepted Offers.
+    Floor and Clearing are cents; Clearing is <NA> where nothing clears."""
+    capacities = np.asarray(capacities, dtype=np.int64)
+    floors = np.asarray(floors, dtype=np.int64)
+    locations = list(accepted)
+
+    # Sorted by location index (not name) so segments follow `locations`
+    loc_index = {loc: k for k, loc in enumerate(locations)}
+    book = book[book["Location"].isin(locations)]
+    book = book.assign(_seg=book["Location"].map(loc_index)).sort_values(["_seg", "Cents"], kind="stable")
+    seg = book["_seg"].to_numpy(dtype=np.int64)
+    price = book["Cents"].to_numpy(dtype=np.int64)
+    volume = book["Volume"].to_numpy(dtype=np.int64)
+    n_loc, n_cap, n_floor = len(locations), len(capacities), len(floors)
+
+    # Segment boundaries: every location gets a (possibly empty) slice
+    starts = np.searchsorted(seg, np.arange(n_loc))
+    ends = np.searchsorted(seg, np.arange(n_loc), side="right")
+    nonempty = np.flatnonzero(ends > starts)
+    bounds = starts[nonempty]
+
+    room = capacities[:, None] - np.array([accepted[loc] for loc in locations], dtype=np.int64)[None, :]
+    room = np.maximum(room, 0)[:, seg]
+
+    none = np.iinfo(np.int64).min  # "nothing taken" in the max-reduction below
+    clearing = np.full((n_cap, n_floor, n_loc), none)
+    taken_vol = np.zeros((n_cap, n_floor, n_loc), dtype=np.int64)
+    taken_n = np.zeros((n_cap, n_floor, n_loc), dtype=np.int64)
+    if len(nonempty) == 0:
+        n_floor = 0  # nothing to clear anywhere
+
+    floor_block = max(1, SIM_BLOCK_CELLS // max(len(price), 1))
+    for f0 in range(0, n_floor, floor_block):
+        fs = slice(f0, f0 + floor_block)
+        # (floor, offer): which offers survive each floor, and their running
+        # volume within their own location (segmented cumsum)
+        eligible = price[None, :] >= floors[fs, None]
+        cum = np.cumsum(np.where(eligible, volume[None, :], 0), axis=1)
+        seg_base = np.concatenate([np.zeros((len(cum), 1), dtype=np.int64), cum], axis=1)[:, starts]
+        cum -= seg_base[:, seg]
+
+        cap_block = max(1, SIM_BLOCK_CELLS // cum.size)
+        for c0 in range(0, n_cap, cap_block):
+            cs = slice(c0, c0 + cap_block)
+            # (capacity, floor, offer): taken if eligible and it still fits
+            taken = eligible[None, :, :] & (cum[None, :, :] <= room[cs, None, :])
+            # Per-location reductions over each segment
+            clearing[cs, fs, nonempty] = np.maximum.reduceat(np.where(taken, price, none), bounds, axis=2)
+            taken_vol[cs, fs, nonempty] = np.add.reduceat(np.where(taken, volume, 0), bounds, axis=2)
+            taken_n[cs, fs, nonempty] = np.add.reduceat(taken.astype(np.int64), bounds, axis=2)
+
+    cap_grid, floor_grid, loc_grid = np.meshgrid(capacities, floors, np.arange(n_loc), indexing="ij")
+    return pd.DataFrame({
+        "Location": np.array(locations, dtype=object)[loc_grid.ravel()],
+        "Capacity": cap_grid.ravel(),
+        "Floor": floor_grid.ravel(),
+        "Clearing": pd.arrays.IntegerArray(clearing.ravel(), clearing.ravel() == none),
+        "Accepted Volume": taken_vol.ravel(),
+        "Accepted Offers": taken_n.ravel(),
+    })
+
+
+def cleared_offers(book, accepted_volume, capacity, floor):
+    """The offers one location would take under a single scenario (floor in
+    cents)."""
+    book = book[book["Cents"] >= floor].sort_values("Cents", kind="stable")
+    room = max(capacity - accepted_volume, 0)
+    return book[book["Volume"].cumsum() <= room]
@@ -0,0 +1,1263 @@
+# --- OFFER STORE ---
+# SQLite-backed auction book shared by every Streamlit session, and by every
+# worker process when the app is scaled out (see gfo_cluster.py).
+# All filtering, searching and paging happens in SQL against the indexes
+# below, so the app only ever pulls the one page of rows it is about to draw.
+import atexit
+import math
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Prices are integer cents (Cents) and volumes integer barrels everywhere in
+# the store, so sums and capacity checks are exact; dollars are display-only.
+OFFER_COLUMNS = ["ID", "Location", "Cents", "Volume", "Term", "User", "Status", "Version"]
+LIVE_STATUSES = ("Pending", "Accepted")
+# Terminal offers are moved out of the hot book into the cold archive
+TERMINAL_STATUSES = ("Rejected", "Cancelled", "Expired", "Settled")
+ARCHIVE_AFTER = 500   # archive once this many terminal offers are in the hot book
+ARCHIVE_BATCH = 5000  # offers moved per archive transaction
+
+# Schema migrations, applied in order. PRAGMA user_version records how many
+# have run, so an existing book file is upgraded in place.
+MIGRATIONS = [
+    """
+    CREATE TABLE offers (
+        id         INTEGER PRIMARY KEY AUTOINCREMENT,
+        location   TEXT    NOT NULL,
+        price      REAL    NOT NULL,
+        volume     INTEGER NOT NULL,
+        term       TEXT    NOT NULL,
+        user       TEXT    NOT NULL,
+        status     TEXT    NOT NULL DEFAULT 'Pending',
+        created_at REAL    NOT NULL,
+        updated_at REAL    NOT NULL
+    );
+    -- board / capacity: location + status equality, then price order
+    CREATE INDEX ix_offers_board ON offers (location, status, price);
+    -- seller prefix search (LIKE is case-insensitive, so index NOCASE)
+    CREATE INDEX ix_offers_user ON offers (location, user COLLATE NOCASE);
+    CREATE INDEX ix_offers_term ON offers (location, term, status);
+    """,
+    """
+    -- Book version: bumped by every write to offers, from any process.
+    -- Sessions compare it to what they last drew to know when to refresh.
+    CREATE TABLE meta (
+        id      INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    );
+    INSERT INTO meta (id, version) VALUES (1, 0);
+    CREATE TRIGGER tr_offers_version_ins AFTER INSERT ON offers
+    BEGIN UPDATE meta SET version = version + 1 WHERE id = 1; END;
+    CREATE TRIGGER tr_offers_version_upd AFTER UPDATE ON offers
+    BEGIN UPDATE meta SET version = version + 1 WHERE id = 1; END;
+    CREATE TRIGGER tr_offers_version_del AFTER DELETE ON offers
+    BEGIN UPDATE meta SET version = version + 1 WHERE id = 1; END;
+    """,
+    """
+    -- Capacity fill history, written on every acceptance.
+    -- Raw tier: fixed-size ring buffer per location (slot = seq % FILL_RAW_SLOTS).
+    CREATE TABLE fill_raw (
+        location TEXT    NOT NULL,
+        slot     INTEGER NOT NULL,
+        seq      INTEGER NOT NULL,
+        ts       REAL    NOT NULL,
+        filled   INTEGER NOT NULL,
+        PRIMARY KEY (location, slot)
+    ) WITHOUT ROWID;
+    CREATE INDEX ix_fill_raw_seq ON fill_raw (location, seq);
+    -- Downsampled tiers: one row per location per bucket, rollups kept current
+    CREATE TABLE fill_minute (
+        location TEXT    NOT NULL,
+        bucket   INTEGER NOT NULL,
+        first    INTEGER NOT NULL,
+        last     INTEGER NOT NULL,
+        low      INTEGER NOT NULL,
+        high     INTEGER NOT NULL,
+        n        INTEGER NOT NULL,
+        PRIMARY KEY (location, bucket)
+    ) WITHOUT ROWID;
+    CREATE TABLE fill_hour (
+        location TEXT    NOT NULL,
+        bucket   INTEGER NOT NULL,
+        first    INTEGER NOT NULL,
+        last     INTEGER NOT NULL,
+        low      INTEGER NOT NULL,
+        high     INTEGER NOT NULL,
+        n        INTEGER NOT NULL,
+        PRIMARY KEY (location, bucket)
+    ) WITHOUT ROWID;
+    """,
+    """
+    -- Supply stack and per-location totals over live (Pending + Accepted)
+    -- offers, kept current by triggers on every insert / update / delete so
+    -- reads never re-aggregate the book.
+    CREATE TABLE supply_levels (
+        location TEXT    NOT NULL,
+        price    REAL    NOT NULL,
+        volume   INTEGER NOT NULL,
+        n        INTEGER NOT NULL,
+        PRIMARY KEY (location, price)
+    ) WITHOUT ROWID;
+    CREATE TABLE location_stats (
+        location        TEXT    PRIMARY KEY,
+        live_volume     INTEGER NOT NULL,
+        live_value      REAL    NOT NULL,
+        live_offers     INTEGER NOT NULL,
+        accepted_volume INTEGER NOT NULL
+    ) WITHOUT ROWID;
+
+    INSERT INTO supply_levels (location, price, volume, n)
+    SELECT location, price, SUM(volume), COUNT(*) FROM offers
+    WHERE status IN ('Pending', 'Accepted') GROUP BY location, price;
+    INSERT INTO location_stats (location, live_volume, live_value, live_offers, accepted_volume)
+    SELECT location, SUM(volume), SUM(price * volume), COUNT(*),
+           SUM(CASE WHEN status = 'Accepted' THEN volume ELSE 0 END)
+    FROM offers WHERE status IN ('Pending', 'Accepted') GROUP BY location;
+
+    CREATE TRIGGER tr_supply_add_ins AFTER INSERT ON offers
+    WHEN NEW.status IN ('Pending', 'Accepted')
+    BEGIN
+        INSERT INTO supply_levels (location, price, volume, n) VALUES (NEW.location, NEW.price, NEW.volume, 1)
+        ON CONFLICT (location, price) DO UPDATE SET volume = volume + excluded.volume, n = n + 1;
+        INSERT INTO location_stats (location, live_volume, live_value, live_offers, accepted_volume)
+        VALUES (NEW.location, NEW.volume, NEW.price * NEW.volume, 1,
+                CASE WHEN NEW.status = 'Accepted' THEN NEW.volume ELSE 0 END)
+        ON CONFLICT (location) DO UPDATE SET
+            live_volume = live_volume + excluded.live_volume,
+            live_value = live_value + excluded.live_value,
+            live_offers = live_offers + 1,
+            accepted_volume = accepted_volume + excluded.accepted_volume;
+    END;
+    CREATE TRIGGER tr_supply_add_upd AFTER UPDATE ON offers
+    WHEN NEW.status IN ('Pending', 'Accepted')
+    BEGIN
+        INSERT INTO supply_levels (location, price, volume, n) VALUES (NEW.location, NEW.price, NEW.volume, 1)
+        ON CONFLICT (location, price) DO UPDATE SET volume = volume + excluded.volume, n = n + 1;
+        INSERT INTO location_stats (location, live_volume, live_value, live_offers, accepted_volume)
+        VALUES (NEW.location, NEW.volume, NEW.price * NEW.volume, 1,
+                CASE WHEN NEW.status = 'Accepted' THEN NEW.volume ELSE 0 END)
+        ON CONFLICT (location) DO UPDATE SET
+            live_volume = live_volume + excluded.live_volume,
+            live_value = live_value + excluded.live_value,
+            live_offers = live_offers + 1,
+            accepted_volume = accepted_volume + excluded.accepted_volume;
+    END;
+    CREATE TRIGGER tr_supply_sub_upd AFTER UPDATE ON offers
+    WHEN OLD.status IN ('Pending', 'Accepted')
+    BEGIN
+        UPDATE supply_levels SET volume = volume - OLD.volume, n = n - 1
+        WHERE location = OLD.location AND price = OLD.price;
+        DELETE FROM supply_levels WHERE location = OLD.location AND price = OLD.price AND n = 0;
+        UPDATE location_stats SET
+            live_volume = live_volume - OLD.volume,
+            live_value = live_value - OLD.price * OLD.volume,
+            live_offers = live_offers - 1,
+            accepted_volume = accepted_volume - CASE WHEN OLD.status = 'Accepted' THEN OLD.volume ELSE 0 END
+        WHERE location = OLD.location;
+    END;
+    CREATE TRIGGER tr_supply_sub_del AFTER DELETE ON offers
+    WHEN OLD.status IN ('Pending', 'Accepted')
+    BEGIN
+        UPDATE supply_levels SET volume = volume - OLD.volume, n = n - 1
+        WHERE location = OLD.location AND price = OLD.price;
+        DELETE FROM supply_levels WHERE location = OLD.location AND price = OLD.price AND n = 0;
+        UPDATE location_stats SET
+            live_volume = live_volume - OLD.volume,
+            live_value = live_value - OLD.price * OLD.volume,
+            live_offers = live_offers - 1,
+            accepted_volume = accepted_volume - CASE WHEN OLD.status = 'Accepted' THEN OLD.volume ELSE 0 END
+        WHERE location = OLD.location;
+    END;
+    """,
+    """
+    -- Finding terminal offers to archive without scanning the book
+    CREATE INDEX ix_offers_status ON offers (status, id);
+    """,
+    """
+    -- Per-seller rollups (per location + term, and overall), kept current by
+    -- triggers as offers are submitted and change state. Archive moves are
+    -- deletes and deliberately leave the rollups alone: they are history.
+    CREATE TABLE seller_stats (
+        user            TEXT    NOT NULL,
+        location        TEXT    NOT NULL,
+        term            TEXT    NOT NULL,
+        n_offers        INTEGER NOT NULL,
+        offered_volume  INTEGER NOT NULL,
+        offered_value   REAL    NOT NULL,
+        pending_volume  INTEGER NOT NULL,
+        accepted_volume INTEGER NOT NULL,
+        rejected_volume INTEGER NOT NULL,
+        PRIMARY KEY (user, location, term)
+    ) WITHOUT ROWID;
+    CREATE TABLE seller_totals (
+        user            TEXT    PRIMARY KEY,
+        n_offers        INTEGER NOT NULL,
+        offered_volume  INTEGER NOT NULL,
+        offered_value   REAL    NOT NULL,
+        pending_volume  INTEGER NOT NULL,
+        accepted_volume INTEGER NOT NULL,
+        rejected_volume INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    -- "top sellers" reads walk these indexes and stop after N rows
+    CREATE INDEX ix_seller_totals_offered ON seller_totals (offered_volume DESC);
+    CREATE INDEX ix_seller_totals_accepted ON seller_totals (accepted_volume DESC);
+
+    INSERT INTO seller_stats
+    SELECT user, location, term, COUNT(*), SUM(volume), SUM(price * volume),
+           SUM(CASE WHEN status = 'Pending' THEN volume ELSE 0 END),
+           SUM(CASE WHEN status = 'Accepted' THEN volume ELSE 0 END),
+           SUM(CASE WHEN status = 'Rejected' THEN volume ELSE 0 END)
+    FROM offers GROUP BY user, location, term;
+    INSERT INTO seller_totals
+    SELECT user, SUM(n_offers), SUM(offered_volume), SUM(offered_value),
+           SUM(pending_volume), SUM(accepted_volume), SUM(rejected_volume)
+    FROM seller_stats GROUP BY user;
+
+    CREATE TRIGGER tr_seller_ins AFTER INSERT ON offers
+    BEGIN
+        INSERT INTO seller_stats (user, location, term, n_offers, offered_volume, offered_value,
+                                  pending_volume, accepted_volume, rejected_volume)
+        VALUES (NEW.user, NEW.location, NEW.term, 1, NEW.volume, NEW.price * NEW.volume,
+                CASE WHEN NEW.status = 'Pending' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Accepted' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Rejected' THEN NEW.volume ELSE 0 END)
+        ON CONFLICT (user, location, term) DO UPDATE SET
+            n_offers = n_offers + excluded.n_offers,
+            offered_volume = offered_volume + excluded.offered_volume,
+            offered_value = offered_value + excluded.offered_value,
+            pending_volume = pending_volume + excluded.pending_volume,
+            accepted_volume = accepted_volume + excluded.accepted_volume,
+            rejected_volume = rejected_volume + excluded.rejected_volume;
+        INSERT INTO seller_totals (user, n_offers, offered_volume, offered_value,
+                                   pending_volume, accepted_volume, rejected_volume)
+        VALUES (NEW.user, 1, NEW.volume, NEW.price * NEW.volume,
+                CASE WHEN NEW.status = 'Pending' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Accepted' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Rejected' THEN NEW.volume ELSE 0 END)
+        ON CONFLICT (user) DO UPDATE SET
+            n_offers = n_offers + excluded.n_offers,
+            offered_volume = offered_volume + excluded.offered_volume,
+            offered_value = offered_value + excluded.offered_value,
+            pending_volume = pending_volume + excluded.pending_volume,
+            accepted_volume = accepted_volume + excluded.accepted_volume,
+            rejected_volume = rejected_volume + excluded.rejected_volume;
+    END;
+    CREATE TRIGGER tr_seller_upd AFTER UPDATE ON offers
+    BEGIN
+        INSERT INTO seller_stats (user, location, term, n_offers, offered_volume, offered_value,
+                                  pending_volume, accepted_volume, rejected_volume)
+        VALUES (OLD.user, OLD.location, OLD.term, -1, -OLD.volume, -OLD.price * OLD.volume,
+                -CASE WHEN OLD.status = 'Pending' THEN OLD.volume ELSE 0 END,
+                -CASE WHEN OLD.status = 'Accepted' THEN OLD.volume ELSE 0 END,
+                -CASE WHEN OLD.status = 'Rejected' THEN OLD.volume ELSE 0 END)
+        ON CONFLICT (user, location, term) DO UPDATE SET
+            n_offers = n_offers + excluded.n_offers,
+            offered_volume = offered_volume + excluded.offered_volume,
+            offered_value = offered_value + excluded.offered_value,
+            pending_volume = pending_volume + excluded.pending_volume,
+            accepted_volume = accepted_volume + excluded.accepted_volume,
+            rejected_volume = rejected_volume + excluded.rejected_volume;
+        INSERT INTO seller_totals (user, n_offers, offered_volume, offered_value,
+                                   pending_volume, accepted_volume, rejected_volume)
+        VALUES (OLD.user, -1, -OLD.volume, -OLD.price * OLD.volume,
+                -CASE WHEN OLD.status = 'Pending' THEN OLD.volume ELSE 0 END,
+                -CASE WHEN OLD.status = 'Accepted' THEN OLD.volume ELSE 0 END,
+                -CASE WHEN OLD.status = 'Rejected' THEN OLD.volume ELSE 0 END)
+        ON CONFLICT (user) DO UPDATE SET
+            n_offers = n_offers + excluded.n_offers,
+            offered_volume = offered_volume + excluded.offered_volume,
+            offered_value = offered_value + excluded.offered_value,
+            pending_volume = pending_volume + excluded.pending_volume,
+            accepted_volume = accepted_volume + excluded.accepted_volume,
+            rejected_volume = rejected_volume + excluded.rejected_volume;
+        INSERT INTO seller_stats (user, location, term, n_offers, offered_volume, offered_value,
+                                  pending_volume, accepted_volume, rejected_volume)
+        VALUES (NEW.user, NEW.location, NEW.term, 1, NEW.volume, NEW.price * NEW.volume,
+                CASE WHEN NEW.status = 'Pending' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Accepted' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Rejected' THEN NEW.volume ELSE 0 END)
+        ON CONFLICT (user, location, term) DO UPDATE SET
+            n_offers = n_offers + excluded.n_offers,
+            offered_volume = offered_volume + excluded.offered_volume,
+            offered_value = offered_value + excluded.offered_value,
+            pending_volume = pending_volume + excluded.pending_volume,
+            accepted_volume = accepted_volume + excluded.accepted_volume,
+            rejected_volume = rejected_volume + excluded.rejected_volume;
+        INSERT INTO seller_totals (user, n_offers, offered_volume, offered_value,
+                                   pending_volume, accepted_volume, rejected_volume)
+        VALUES (NEW.user, 1, NEW.volume, NEW.price * NEW.volume,
+                CASE WHEN NEW.status = 'Pending' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Accepted' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Rejected' THEN NEW.volume ELSE 0 END)
+        ON CONFLICT (user) DO UPDATE SET
+            n_offers = n_offers + excluded.n_offers,
+            offered_volume = offered_volume + excluded.offered_volume,
+            offered_value = offered_value + excluded.offered_value,
+            pending_volume = pending_volume + excluded.pending_volume,
+            accepted_volume = accepted_volume + excluded.accepted_volume,
+            rejected_volume = rejected_volume + excluded.rejected_volume;
+    END;
+    """,
+    """
+    -- Idempotency keys of seller submissions. A double-tapped or retried
+    -- submit carries the same key and resolves to the offer it first created.
+    -- Kept apart from offers so keys outlive the offer's move to the archive.
+    CREATE TABLE submissions (
+        key        TEXT    PRIMARY KEY,
+        offer_id   INTEGER NOT NULL,
+        created_at REAL    NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX ix_submissions_age ON submissions (created_at);
+    """,
+    """
+    -- Capacity threshold crossings, recorded once by the write that caused
+    -- them. Every worker process tails this table to fan alerts out.
+    CREATE TABLE capacity_alerts (
+        id       INTEGER PRIMARY KEY AUTOINCREMENT,
+        location TEXT    NOT NULL,
+        level    TEXT    NOT NULL,
+        filled   INTEGER NOT NULL,
+        capacity INTEGER NOT NULL,
+        ts       REAL    NOT NULL
+    );
+    """,
+    """
+    -- Per-offer version, bumped by every amendment, cancellation and
+    -- decision. Writes name the version they were based on.
+    ALTER TABLE offers ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
+    -- A seller's own offers across terminals
+    CREATE INDEX ix_offers_seller ON offers (user, status);
+    """,
+    """
+    -- Fixed point: prices become integer cents (price_cents) and every
+    -- value aggregate becomes exact integer cents x bbl. SQLite cannot change
+    -- a column's type, so offers and the aggregates are rebuilt, and their
+    -- indexes and triggers recreated against the new columns.
+    CREATE TABLE offers_new (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        location    TEXT    NOT NULL,
+        price_cents INTEGER NOT NULL,
+        volume      INTEGER NOT NULL,
+        term        TEXT    NOT NULL,
+        user        TEXT    NOT NULL,
+        status      TEXT    NOT NULL DEFAULT 'Pending',
+        created_at  REAL    NOT NULL,
+        updated_at  REAL    NOT NULL,
+        version     INTEGER NOT NULL DEFAULT 1
+    );
+    INSERT INTO offers_new (id, location, price_cents, volume, term, user, status, created_at, updated_at, version)
+    SELECT id, location, CAST(ROUND(price * 100) AS INTEGER), CAST(volume AS INTEGER), term, user, status,
+           created_at, updated_at, version
+    FROM offers;
+    -- Keep the ID sequence: archived offers still own their IDs
+    DELETE FROM sqlite_sequence WHERE name = 'offers_new';
+    INSERT INTO sqlite_sequence (name, seq) SELECT 'offers_new', seq FROM sqlite_sequence WHERE name = 'offers';
+    DROP TABLE offers;
+    ALTER TABLE offers_new RENAME TO offers;
+    CREATE INDEX ix_offers_board ON offers (location, status, price_cents);
+    CREATE INDEX ix_offers_user ON offers (location, user COLLATE NOCASE);
+    CREATE INDEX ix_offers_term ON offers (location, term, status);
+    CREATE INDEX ix_offers_status ON offers (status, id);
+    CREATE INDEX ix_offers_seller ON offers (user, status);
+
+    CREATE TRIGGER tr_offers_version_ins AFTER INSERT ON offers
+    BEGIN UPDATE meta SET version = version + 1 WHERE id = 1; END;
+    CREATE TRIGGER tr_offers_version_upd AFTER UPDATE ON offers
+    BEGIN UPDATE meta SET version = version + 1 WHERE id = 1; END;
+    CREATE TRIGGER tr_offers_version_del AFTER DELETE ON offers
+    BEGIN UPDATE meta SET version = version + 1 WHERE id = 1; END;
+
+    DROP TABLE supply_levels;
+    DROP TABLE location_stats;
+    CREATE TABLE supply_levels (
+        location    TEXT    NOT NULL,
+        price_cents INTEGER NOT NULL,
+        volume      INTEGER NOT NULL,
+        n           INTEGER NOT NULL,
+        PRIMARY KEY (location, price_cents)
+    ) WITHOUT ROWID;
+    CREATE TABLE location_stats (
+        location        TEXT    PRIMARY KEY,
+        live_volume     INTEGER NOT NULL,
+        live_value      INTEGER NOT NULL,  -- cents x bbl
+        live_offers     INTEGER NOT NULL,
+        accepted_volume INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    INSERT INTO supply_levels (location, price_cents, volume, n)
+    SELECT location, price_cents, SUM(volume), COUNT(*) FROM offers
+    WHERE status IN ('Pending', 'Accepted') GROUP BY location, price_cents;
+    INSERT INTO location_stats (location, live_volume, live_value, live_offers, accepted_volume)
+    SELECT location, SUM(volume), SUM(price_cents * volume), COUNT(*),
+           SUM(CASE WHEN status = 'Accepted' THEN volume ELSE 0 END)
+    FROM offers WHERE status IN ('Pending', 'Accepted') GROUP BY location;
+
+    CREATE TRIGGER tr_supply_add_ins AFTER INSERT ON offers
+    WHEN NEW.status IN ('Pending', 'Accepted')
+    BEGIN
+        INSERT INTO supply_levels (location, price_cents, volume, n) VALUES (NEW.location, NEW.price_cents, NEW.volume, 1)
+        ON CONFLICT (location, price_cents) DO UPDATE SET volume = volume + excluded.volume, n = n + 1;
+        INSERT INTO location_stats (location, live_volume, live_value, live_offers, accepted_volume)
+        VALUES (NEW.location, NEW.volume, NEW.price_cents * NEW.volume, 1,
+                CASE WHEN NEW.status = 'Accepted' THEN NEW.volume ELSE 0 END)
+        ON CONFLICT (location) DO UPDATE SET
+            live_volume = live_volume + excluded.live_volume,
+            live_value = live_value + excluded.live_value,
+            live_offers = live_offers + 1,
+            accepted_volume = accepted_volume + excluded.accepted_volume;
+    END;
+    CREATE TRIGGER tr_supply_add_upd AFTER UPDATE ON offers
+    WHEN NEW.status IN ('Pending', 'Accepted')
+    BEGIN
+        INSERT INTO supply_levels (location, price_cents, volume, n) VALUES (NEW.location, NEW.price_cents, NEW.volume, 1)
+        ON CONFLICT (location, price_cents) DO UPDATE SET volume = volume + excluded.volume, n = n + 1;
+        INSERT INTO location_stats (location, live_volume, live_value, live_offers, accepted_volume)
+        VALUES (NEW.location, NEW.volume, NEW.price_cents * NEW.volume, 1,
+                CASE WHEN NEW.status = 'Accepted' THEN NEW.volume ELSE 0 END)
+        ON CONFLICT (location) DO UPDATE SET
+            live_volume = live_volume + excluded.live_volume,
+            live_value = live_value + excluded.live_value,
+            live_offers = live_offers + 1,
+            accepted_volume = accepted_volume + excluded.accepted_volume;
+    END;
+    CREATE TRIGGER tr_supply_sub_upd AFTER UPDATE ON offers
+    WHEN OLD.status IN ('Pending', 'Accepted')
+    BEGIN
+        UPDATE supply_levels SET volume = volume - OLD.volume, n = n - 1
+        WHERE location = OLD.location AND price_cents = OLD.price_cents;
+        DELETE FROM supply_levels WHERE location = OLD.location AND price_cents = OLD.price_cents AND n = 0;
+        UPDATE location_stats SET
+            live_volume = live_volume - OLD.volume,
+            live_value = live_value - OLD.price_cents * OLD.volume,
+            live_offers = live_offers - 1,
+            accepted_volume = accepted_volume - CASE WHEN OLD.status = 'Accepted' THEN OLD.volume ELSE 0 END
+        WHERE location = OLD.location;
+    END;
+    CREATE TRIGGER tr_supply_sub_del AFTER DELETE ON offers
+    WHEN OLD.status IN ('Pending', 'Accepted')
+    BEGIN
+        UPDATE supply_levels SET volume = volume - OLD.volume, n = n - 1
+        WHERE location = OLD.location AND price_cents = OLD.price_cents;
+        DELETE FROM supply_levels WHERE location = OLD.location AND price_cents = OLD.price_cents AND n = 0;
+        UPDATE location_stats SET
+            live_volume = live_volume - OLD.volume,
+            live_value = live_value - OLD.price_cents * OLD.volume,
+            live_offers = live_offers - 1,
+            accepted_volume = accepted_volume - CASE WHEN OLD.status = 'Accepted' THEN OLD.volume ELSE 0 END
+        WHERE location = OLD.location;
+    END;
+
+    -- Seller rollups hold history beyond the hot book, so they are converted
+    -- in place rather than recomputed
+    CREATE TABLE seller_stats_new (
+        user            TEXT    NOT NULL,
+        location        TEXT    NOT NULL,
+        term            TEXT    NOT NULL,
+        n_offers        INTEGER NOT NULL,
+        offered_volume  INTEGER NOT NULL,
+        offered_value   INTEGER NOT NULL,  -- cents x bbl
+        pending_volume  INTEGER NOT NULL,
+        accepted_volume INTEGER NOT NULL,
+        rejected_volume INTEGER NOT NULL,
+        PRIMARY KEY (user, location, term)
+    ) WITHOUT ROWID;
+    CREATE TABLE seller_totals_new (
+        user            TEXT    PRIMARY KEY,
+        n_offers        INTEGER NOT NULL,
+        offered_volume  INTEGER NOT NULL,
+        offered_value   INTEGER NOT NULL,  -- cents x bbl
+        pending_volume  INTEGER NOT NULL,
+        accepted_volume INTEGER NOT NULL,
+        rejected_volume INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    INSERT INTO seller_stats_new
+    SELECT user, location, term, n_offers, offered_volume, CAST(ROUND(offered_value * 100) AS INTEGER),
+           pending_volume, accepted_volume, rejected_volume
+    FROM seller_stats;
+    INSERT INTO seller_totals_new
+    SELECT user, n_offers, offered_volume, CAST(ROUND(offered_value * 100) AS INTEGER),
+           pending_volume, accepted_volume, rejected_volume
+    FROM seller_totals;
+    DROP TABLE seller_stats;
+    DROP TABLE seller_totals;
+    ALTER TABLE seller_stats_new RENAME TO seller_stats;
+    ALTER TABLE seller_totals_new RENAME TO seller_totals;
+    CREATE INDEX ix_seller_totals_offered ON seller_totals (offered_volume DESC);
+    CREATE INDEX ix_seller_totals_accepted ON seller_totals (accepted_volume DESC);
+
+    CREATE TRIGGER tr_seller_ins AFTER INSERT ON offers
+    BEGIN
+        INSERT INTO seller_stats (user, location, term, n_offers, offered_volume, offered_value,
+                                  pending_volume, accepted_volume, rejected_volume)
+        VALUES (NEW.user, NEW.location, NEW.term, 1, NEW.volume, NEW.price_cents * NEW.volume,
+                CASE WHEN NEW.status = 'Pending' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Accepted' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Rejected' THEN NEW.volume ELSE 0 END)
+        ON CONFLICT (user, location, term) DO UPDATE SET
+            n_offers = n_offers + excluded.n_offers,
+            offered_volume = offered_volume + excluded.offered_volume,
+            offered_value = offered_value + excluded.offered_value,
+            pending_volume = pending_volume + excluded.pending_volume,
+            accepted_volume = accepted_volume + excluded.accepted_volume,
+            rejected_volume = rejected_volume + excluded.rejected_volume;
+        INSERT INTO seller_totals (user, n_offers, offered_volume, offered_value,
+                                   pending_volume, accepted_volume, rejected_volume)
+        VALUES (NEW.user, 1, NEW.volume, NEW.price_cents * NEW.volume,
+                CASE WHEN NEW.status = 'Pending' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Accepted' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Rejected' THEN NEW.volume ELSE 0 END)
+        ON CONFLICT (user) DO UPDATE SET
+            n_offers = n_offers + excluded.n_offers,
+            offered_volume = offered_volume + excluded.offered_volume,
+            offered_value = offered_value + excluded.offered_value,
+            pending_volume = pending_volume + excluded.pending_volume,
+            accepted_volume = accepted_volume + excluded.accepted_volume,
+            rejected_volume = rejected_volume + excluded.rejected_volume;
+    END;
+    CREATE TRIGGER tr_seller_upd AFTER UPDATE ON offers
+    BEGIN
+        INSERT INTO seller_stats (user, location, term, n_offers, offered_volume, offered_value,
+                                  pending_volume, accepted_volume, rejected_volume)
+        VALUES (OLD.user, OLD.location, OLD.term, -1, -OLD.volume, -OLD.price_cents * OLD.volume,
+                -CASE WHEN OLD.status = 'Pending' THEN OLD.volume ELSE 0 END,
+                -CASE WHEN OLD.status = 'Accepted' THEN OLD.volume ELSE 0 END,
+                -CASE WHEN OLD.status = 'Rejected' THEN OLD.volume ELSE 0 END)
+        ON CONFLICT (user, location, term) DO UPDATE SET
+            n_offers = n_offers + excluded.n_offers,
+            offered_volume = offered_volume + excluded.offered_volume,
+            offered_value = offered_value + excluded.offered_value,
+            pending_volume = pending_volume + excluded.pending_volume,
+            accepted_volume = accepted_volume + excluded.accepted_volume,
+            rejected_volume = rejected_volume + excluded.rejected_volume;
+        INSERT INTO seller_totals (user, n_offers, offered_volume, offered_value,
+                                   pending_volume, accepted_volume, rejected_volume)
+        VALUES (OLD.user, -1, -OLD.volume, -OLD.price_cents * OLD.volume,
+                -CASE WHEN OLD.status = 'Pending' THEN OLD.volume ELSE 0 END,
+                -CASE WHEN OLD.status = 'Accepted' THEN OLD.volume ELSE 0 END,
+                -CASE WHEN OLD.status = 'Rejected' THEN OLD.volume ELSE 0 END)
+        ON CONFLICT (user) DO UPDATE SET
+            n_offers = n_offers + excluded.n_offers,
+            offered_volume = offered_volume + excluded.offered_volume,
+            offered_value = offered_value + excluded.offered_value,
+            pending_volume = pending_volume + excluded.pending_volume,
+            accepted_volume = accepted_volume + excluded.accepted_volume,
+            rejected_volume = rejected_volume + excluded.rejected_volume;
+        INSERT INTO seller_stats (user, location, term, n_offers, offered_volume, offered_value,
+                                  pending_volume, accepted_volume, rejected_volume)
+        VALUES (NEW.user, NEW.location, NEW.term, 1, NEW.volume, NEW.price_cents * NEW.volume,
+                CASE WHEN NEW.status = 'Pending' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Accepted' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Rejected' THEN NEW.volume ELSE 0 END)
+        ON CONFLICT (user, location, term) DO UPDATE SET
+            n_offers = n_offers + excluded.n_offers,
+            offered_volume = offered_volume + excluded.offered_volume,
+            offered_value = offered_value + excluded.offered_value,
+            pending_volume = pending_volume + excluded.pending_volume,
+            accepted_volume = accepted_volume + excluded.accepted_volume,
+            rejected_volume = rejected_volume + excluded.rejected_volume;
+        INSERT INTO seller_totals (user, n_offers, offered_volume, offered_value,
+                                   pending_volume, accepted_volume, rejected_volume)
+        VALUES (NEW.user, 1, NEW.volume, NEW.price_cents * NEW.volume,
+                CASE WHEN NEW.status = 'Pending' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Accepted' THEN NEW.volume ELSE 0 END,
+                CASE WHEN NEW.status = 'Rejected' THEN NEW.volume ELSE 0 END)
+        ON CONFLICT (user) DO UPDATE SET
+            n_offers = n_offers + excluded.n_offers,
+            offered_volume = offered_volume + excluded.offered_volume,
+            offered_value = offered_value + excluded.offered_value,
+            pending_volume = pending_volume + excluded.pending_volume,
+            accepted_volume = accepted_volume + excluded.accepted_volume,
+            rejected_volume = rejected_volume + excluded.rejected_volume;
+    END;
+    """,
+    """
+    -- Delivery cursor for external alert sinks: a worker claims undelivered
+    -- alerts by stamping delivered_at, so each goes out once whichever
+    -- worker (or how many) is running. Alerts already fanned out before this
+    -- column existed count as delivered.
+    ALTER TABLE capacity_alerts ADD COLUMN delivered_at REAL;
+    UPDATE capacity_alerts SET delivered_at = ts;
+    CREATE INDEX ix_alerts_undelivered ON capacity_alerts (id) WHERE delivered_at IS NULL;
+    """,
+    """
+    -- Board pages walk a location's offers in price order. ix_offers_board
+    -- leads with status, so a multi-status page sorted a location's whole
+    -- live set; this one serves the ORDER BY straight from the index.
+    CREATE INDEX ix_offers_price ON offers (location, price_cents, id);
+    """,
+]
+
+# --- FILL HISTORY TIERS ---
+FILL_RAW_SLOTS = 1000               # raw points kept per location
+FILL_MINUTE_KEEP = 31 * 24 * 3600   # minute buckets kept for a month, hours forever
+FILL_TIERS = [
+    # (table, bucket seconds, longest window served from it)
+    ("fill_minute", 60, 14 * 24 * 3600),
+    ("fill_hour", 3600, None),
+]
+
+# --- CAPACITY ALERTS ---
+# (share of capacity accepted, level), highest first
+ALERT_LEVELS = [(1.0, "FULL"), (0.8, "NEAR CAPACITY")]
+
+# --- WRITE-BEHIND SUBMISSIONS ---
+SUBMIT_FLUSH_SECONDS = 0.005  # group-commit window after the first queued offer
+SUBMIT_BATCH = 1000           # most submissions per commit
+SUBMISSION_KEEP = 24 * 3600   # idempotency keys remembered for a day
+RECENT_KEYS = 10000           # keys answered from memory, without a query
+
+
+class OfferConflict(Exception):
+    """An amend / cancel that no longer applies: the offer was decided,
+    changed or archived since the caller read it, or is not theirs."""
+
+    def __init__(self, offer_id, reason):
+        super().__init__(f"Offer #{offer_id} {reason}")
+        self.offer_id = offer_id
+        self.reason = reason
+
+
+class CapacityError(Exception):
+    def __init__(self, location, volume, remaining):
+        super().__init__(f"{location}: accepting {volume:,} bbl would exceed capacity ({remaining:,} bbl left)")
+        self.location = location
+        self.volume = volume
+        self.remaining = remaining
+
+
+def _statements(script):
+    # Split a migration into statements (trigger bodies contain ';' too)
+    buf = ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            yield buf
+            buf = ""
+    if buf.strip():
+        yield buf
+
+
+SELLER_COLUMNS = ["Offers", "Offered", "Pending", "Accepted", "Rejected", "Avg Cents"]
+
+
+def _seller_row(row):
+    n, offered, value, pending, accepted, rejected = row
+    return {
+        "Offers": n,
+        "Offered": offered,
+        "Pending": pending,
+        "Accepted": accepted,
+        "Rejected": rejected,
+        "Avg Cents": value / offered if offered else None,
+    }
+
+
+def _whole(n):
+    # Cents and barrels are whole numbers; refuse anything that would round
+    if not math.isfinite(n) or n != int(n):
+        raise ValueError(f"expected a whole number, got {n!r}")
+    return int(n)
+
+
+def _barrels(n):
+    # An offer's volume: whole and positive, or the aggregates go wrong
+    n = _whole(n)
+    if n <= 0:
+        raise ValueError(f"volume must be positive, got {n!r}")
+    return n
+
+
+def alert_level(filled, capacity):
+    for share, level in ALERT_LEVELS:
+        if filled >= share * capacity:
+            return level
+    return None
+
+
+def _resolve_duplicate(first, ticket):
+    # A repeat of a key still in flight: same offer, flagged as a duplicate
+    if first.exception() is not None:
+        ticket.set_exception(first.exception())
+    else:
+        ticket.set_result((first.result()[0], True))
+
+
+class OfferStore:
+    def __init__(self, path, archive=None):
+        self.path = path
+        self.archive = archive
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._recent = OrderedDict()  # idempotency key -> Future, newest last
+        self._recent_lock = threading.Lock()
+        self._writer = None
+        self._last_prune = 0
+        self.alerts_posted = threading.Event()  # set when this process records an alert
+        with self._write() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for step, script in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in _statements(script):
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {step}")
+
+    # --- CONNECTIONS ---
+    # Two connections per thread (Streamlit runs each session on its own
+    # thread), one for reads and one for writes, so a session can write while
+    # it holds a read snapshot open. Autocommit mode so transactions are
+    # always explicit.
+    @property
+    def conn(self):
+        return self._connect("conn")
+
+    def _connect(self, name):
+        conn = getattr(self._local, name, None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            setattr(self._local, name, conn)
+        return conn
+
+    @contextmanager
+    def snapshot(self):
+        """Serve every read in the block from one consistent snapshot of the
+        book. In WAL mode a reader holds nothing a writer waits for, so a
+        long render never blocks a submission or a decision."""
+        conn = self.conn
+        if conn.in_transaction:
+            yield
+            return
+        conn.execute("BEGIN")
+        try:
+            # A deferred transaction pins its snapshot at the first read
+            conn.execute("SELECT version FROM meta WHERE id = 1")
+            yield
+        finally:
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def _write(self):
+        conn = self._connect("wconn")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # --- WRITES ---
+    def seed(self, offers):
+        """Load starter offers into an empty book."""
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM offers LIMIT 1").fetchone():
+                return
+            for o in offers:
+                self._insert(conn, o["Location"], o["Cents"], o["Volume"], o["Term"], o["User"], o.get("Status", "Pending"))
+
+    def add_offer(self, location, price_cents, volume, term, user):
+        with self._write() as conn:
+            return self._insert(conn, location, price_cents, volume, term, user, "Pending")
+
+    # --- WRITE-BEHIND SUBMISSIONS ---
+    # Seller submissions are queued and group-committed by one writer thread
+    # per process: whatever arrives within SUBMIT_FLUSH_SECONDS goes into a
+    # single transaction, so a rush at auction open costs a handful of
+    # commits (and book-version bumps) instead of one per seller. Queued
+    # offers not yet committed are lost if the process dies; callers wait
+    # on the returned Future to know an offer is in the book.
+    def submit(self, key, location, price_cents, volume, term, user):
+        """Queue a seller's offer under an idempotency key. Returns a Future
+        resolving to (offer_id, duplicate); a key seen before, by this or any
+        other process, resolves to the offer it first created. Raises
+        ValueError at once for a fractional price or a bad volume."""
+        price_cents, volume = _whole(price_cents), _barrels(volume)
+        with self._recent_lock:
+            first = self._recent.get(key)
+            ticket = Future()
+            if first is not None:
+                first.add_done_callback(lambda f: _resolve_duplicate(f, ticket))
+                return ticket
+            self._recent[key] = ticket
+            if len(self._recent) > RECENT_KEYS:
+                self._recent.popitem(last=False)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_behind, name="gfo-submissions", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+        self._queue.put((key, location, price_cents, volume, term, user, ticket))
+        return ticket
+
+    def flush(self):
+        """Block until every queued submission is committed."""
+        self._queue.join()
+
+    def _write_behind(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + SUBMIT_FLUSH_SECONDS
+            while len(batch) < SUBMIT_BATCH:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                results = self._commit_submissions(batch)
+            except Exception as e:
+                results = [e] * len(batch)
+            for item, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    # Not stored: a retry under the same key must try again
+                    with self._recent_lock:
+                        self._recent.pop(item[0], None)
+                    item[-1].set_exception(result)
+                else:
+                    item[-1].set_result(result)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _commit_submissions(self, batch):
+        # One transaction for the batch, a savepoint per submission: one that
+        # fails is rolled back and reported alone, the rest still commit.
+        # Returns (offer_id, duplicate) or the exception, per submission.
+        now = time.time()
+        results = []
+        with self._write() as conn:
+            for key, location, price_cents, volume, term, user, _ in batch:
+                row = conn.execute("SELECT offer_id FROM submissions WHERE key = ?", (key,)).fetchone()
+                if row:
+                    results.append((row[0], True))
+                    continue
+                conn.execute("SAVEPOINT submission")
+                try:
+                    offer_id = self._insert(conn, location, price_cents, volume, term, user, "Pending")
+                    conn.execute(
+                        "INSERT INTO submissions (key, offer_id, created_at) VALUES (?, ?, ?)", (key, offer_id, now)
+                    )
+                except (sqlite3.Error, ValueError) as e:
+                    conn.execute("ROLLBACK TO submission")
+                    results.append(e)
+                else:
+                    results.append((offer_id, False))
+                conn.execute("RELEASE submission")
+            if now - self._last_prune > 3600:
+                conn.execute("DELETE FROM submissions WHERE created_at < ?", (now - SUBMISSION_KEEP,))
+                self._last_prune = now
+        return results
+
+    def _insert(self, conn, location, price_cents, volume, term, user, status):
+        now = time.time()
+        cur = conn.execute(
+            "INSERT INTO offers (location, price_cents, volume, term, user, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (location, _whole(price_cents), _barrels(volume), term, user, status, now, now),
+        )
+        return cur.lastrowid
+
+    def apply_decisions(self, decisions, capacity, versions=None):
+        """Apply a batch of admin decisions ({offer_id: "Accepted" | "Rejected"})
+        in one write transaction, with a single capacity check for every
+        location touched. Offers that are no longer pending are skipped, as
+        are offers amended since the version given in `versions` ({offer_id:
+        version}, if any). `capacity` is bbl per location, or a {location:
+        bbl} mapping.
+        Raises CapacityError, changing nothing, if the batch would overfill a
+        location. Returns (applied, skipped)."""
+        if not isinstance(capacity, dict):
+            capacity = defaultdict(lambda bbl=capacity: bbl)
+        ids = list(decisions)
+        if not ids:
+            return 0, 0
+        with self._write() as conn:
+            marks = ", ".join("?" * len(ids))
+            rows = conn.execute(
+                f"SELECT id, location, volume, version FROM offers WHERE status = 'Pending' AND id IN ({marks})", ids
+            ).fetchall()
+            if versions:
+                rows = [r for r in rows if versions.get(r[0], r[3]) == r[3]]
+
+            adding = defaultdict(int)
+            for offer_id, location, volume, _ in rows:
+                if decisions[offer_id] == "Accepted":
+                    adding[location] += volume
+            if adding:
+                marks = ", ".join("?" * len(adding))
+                filled = dict(conn.execute(
+                    f"SELECT location, accepted_volume FROM location_stats WHERE location IN ({marks})", list(adding)
+                ).fetchall())
+                for location, volume in adding.items():
+                    remaining = capacity[location] - filled.get(location, 0)
+                    if volume > remaining:
+                        raise CapacityError(location, volume, remaining)
+
+            now = time.time()
+            conn.executemany(
+                "UPDATE offers SET status = ?, updated_at = ?, version = version + 1 WHERE id = ?",
+                [(decisions[offer_id], now, offer_id) for offer_id, _, _, _ in rows],
+            )
+            alerts = []
+            for location, volume in adding.items():
+                before = filled.get(location, 0)
+                self._record_fill(conn, location, before + volume, now)
+                level = alert_level(before + volume, capacity[location])
+                if level is not None and level != alert_level(before, capacity[location]):
+                    alerts.append((location, level, before + volume, capacity[location], now))
+            conn.executemany(
+                "INSERT INTO capacity_alerts (location, level, filled, capacity, ts) VALUES (?, ?, ?, ?, ?)", alerts
+            )
+        if alerts:
+            self.alerts_posted.set()
+        self._maybe_archive()
+        return len(rows), len(ids) - len(rows)
+
+    # --- SELLER AMENDMENTS ---
+    # Optimistic concurrency: the seller's edit names the offer version it was
+    # made against and only applies if the offer is still at that version and
+    # pending. Triggers move the offer within the price-ordered index and the
+    # supply / seller aggregates, each an O(log n) B-tree update.
+    def amend_offer(self, offer_id, user, version, price_cents=None, volume=None):
+        """Change a pending offer's price and/or volume. Raises OfferConflict
+        if the offer moved on from `version`, ValueError for a fractional
+        price or a volume that is not a positive whole number. Returns the
+        new version."""
+        return self._change_offer(
+            offer_id, user, version, "price_cents = COALESCE(?, price_cents), volume = COALESCE(?, volume)",
+            [None if price_cents is None else _whole(price_cents), None if volume is None else _barrels(volume)],
+        )
+
+    def cancel_offer(self, offer_id, user, version):
+        """Withdraw a pending offer. Raises OfferConflict if the offer moved
+        on from `version`. Returns the new version."""
+        new_version = self._change_offer(offer_id, user, version, "status = 'Cancelled'", [])
+        self._maybe_archive()
+        return new_version
+
+    def _change_offer(self, offer_id, user, version, assignments, params):
+        with self._write() as conn:
+            cur = conn.execute(
+                f"UPDATE offers SET {assignments}, version = version + 1, updated_at = ? "
+                "WHERE id = ? AND user = ? AND status = 'Pending' AND version = ?",
+                [*params, time.time(), offer_id, user, version],
+            )
+            if cur.rowcount == 0:
+                row = conn.execute("SELECT user, status, version FROM offers WHERE id = ?", (offer_id,)).fetchone()
+                if row is None:
+                    reason = "is no longer in the book"
+                elif row[0] != user:
+                    reason = "is not yours"
+                elif row[1] != "Pending":
+                    reason = f"is already {row[1]}"
+                else:
+                    reason = f"was changed since you loaded it (now version {row[2]})"
+                raise OfferConflict(offer_id, reason)
+        return version + 1
+
+    # --- HOT / COLD TIERING ---
+    def archive_terminal(self, limit=ARCHIVE_BATCH):
+        """Move up to `limit` terminal-state offers into the cold archive.
+        The Parquet write happens inside the delete transaction, so an offer
+        is never missing from both tiers. Returns the number moved."""
+        if self.archive is None:
+            return 0
+        marks = ", ".join("?" * len(TERMINAL_STATUSES))
+        with self._write() as conn:
+            rows = conn.execute(
+                "SELECT id, location, strftime('%Y-%m', created_at, 'unixepoch'), price_cents / 100.0, volume, term, user, "
+                f"status, created_at, updated_at FROM offers WHERE status IN ({marks}) ORDER BY id LIMIT ?",
+                (*TERMINAL_STATUSES, limit),
+            ).fetchall()
+            if rows:
+                self.archive.write(rows)
+                conn.executemany("DELETE FROM offers WHERE id = ?", [(r[0],) for r in rows])
+        return len(rows)
+
+    def _maybe_archive(self):
+        # Counted on the write connection: the read connection may be inside
+        # a page's snapshot taken before the write that just committed
+        if self.archive is None or self._terminal_count(self._connect("wconn")) < ARCHIVE_AFTER:
+            return
+        while self.archive_terminal() == ARCHIVE_BATCH:
+            pass
+
+    def terminal_count(self):
+        return self._terminal_count(self.conn)
+
+    @staticmethod
+    def _terminal_count(conn):
+        marks = ", ".join("?" * len(TERMINAL_STATUSES))
+        return conn.execute(
+            f"SELECT COUNT(*) FROM offers WHERE status IN ({marks})", TERMINAL_STATUSES
+        ).fetchone()[0]
+
+    def _record_fill(self, conn, location, filled, now):
+        # One raw point into the ring buffer...
+        seq = conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) + 1 FROM fill_raw WHERE location = ?", (location,)
+        ).fetchone()[0]
+        conn.execute(
+            "INSERT OR REPLACE INTO fill_raw (location, slot, seq, ts, filled) VALUES (?, ?, ?, ?, ?)",
+            (location, seq % FILL_RAW_SLOTS, seq, now, filled),
+        )
+        # ...and rolled into each downsampled tier
+        for table, width, _ in FILL_TIERS:
+            conn.execute(
+                f"INSERT INTO {table} (location, bucket, first, last, low, high, n) VALUES (?, ?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (location, bucket) DO UPDATE SET "
+                "last = excluded.last, low = MIN(low, excluded.low), high = MAX(high, excluded.high), n = n + 1",
+                (location, int(now // width) * width, filled, filled, filled, filled),
+            )
+        conn.execute(
+            "DELETE FROM fill_minute WHERE location = ? AND bucket < ?", (location, now - FILL_MINUTE_KEEP)
+        )
+
+    # --- READS ---
+    def version(self):
+        return self.conn.execute("SELECT version FROM meta WHERE id = 1").fetchone()[0]
+
+    def alerts_since(self, after_id, limit=500):
+        """Capacity alerts recorded after `after_id`, oldest first, as
+        (id, location, level, filled, capacity, ts) tuples."""
+        return self.conn.execute(
+            "SELECT id, location, level, filled, capacity, ts FROM capacity_alerts WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit),
+        ).fetchall()
+
+    def claim_alerts(self, limit=500):
+        """Take up to `limit` alerts no worker has delivered yet, oldest
+        first, marking them delivered. Each alert is claimed exactly once."""
+        if self.conn.execute("SELECT 1 FROM capacity_alerts WHERE delivered_at IS NULL LIMIT 1").fetchone() is None:
+            return []
+        with self._write() as conn:
+            rows = conn.execute(
+                "SELECT id, location, level, filled, capacity, ts FROM capacity_alerts"
+                " WHERE delivered_at IS NULL ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+            if rows:
+                conn.execute(
+                    f"UPDATE capacity_alerts SET delivered_at = ? WHERE id IN ({', '.join('?' * len(rows))})"
+                    " AND delivered_at IS NULL",
+                    [time.time()] + [row[0] for row in rows],
+                )
+        return rows
+
+    def last_alert_id(self):
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM capacity_alerts").fetchone()[0]
+
+    def accepted_volume(self, location):
+        return self._accepted_volume(self.conn, location)
+
+    @staticmethod
+    def _accepted_volume(conn, location):
+        row = conn.execute("SELECT accepted_volume FROM location_stats WHERE location = ?", (location,)).fetchone()
+        return row[0] if row else 0
+
+    # --- SUPPLY ANALYTICS ---
+    # All served from the trigger-maintained supply_levels / location_stats
+    # tables: cost depends on the number of distinct price levels, not offers.
+    def supply_curve(self, location):
+        """Live supply stack, cheapest first: Cents, Volume, Cumulative."""
+        rows = self.conn.execute(
+            "SELECT price_cents, volume, SUM(volume) OVER (ORDER BY price_cents) FROM supply_levels "
+            "WHERE location = ? ORDER BY price_cents",
+            (location,),
+        ).fetchall()
+        return pd.DataFrame(rows, columns=["Cents", "Volume", "Cumulative"])
+
+    def supply_stats(self, location, capacity):
+        """Live volume, offer count, volume-weighted average differential and
+        the marginal differential at which `capacity` fills (None if the live
+        book does not reach it)."""
+        row = self.conn.execute(
+            "SELECT live_volume, live_value, live_offers FROM location_stats WHERE location = ?", (location,)
+        ).fetchone()
+        live_volume, live_value, live_offers = row or (0, 0, 0)
+        fills_at = self.conn.execute(
+            "SELECT price_cents FROM (SELECT price_cents, SUM(volume) OVER (ORDER BY price_cents) AS cum "
+            "FROM supply_levels WHERE location = ?) WHERE cum >= ? ORDER BY price_cents LIMIT 1",
+            (location, capacity),
+        ).fetchone()
+        return {
+            "live_volume": live_volume,
+            "live_offers": live_offers,
+            "vwap": live_value / live_volume if live_volume else None,
+            "fills_at": fills_at[0] if fills_at else None,
+        }
+
+    def offers_by_ids(self, ids):
+        """Current state of the given offers, in the order the IDs were given."""
+        if not ids:
+            return pd.DataFrame(columns=OFFER_COLUMNS)
+        rows = self.conn.execute(
+            f"SELECT id, location, price_cents, volume, term, user, status, version FROM offers WHERE id IN ({', '.join('?' * len(ids))})",
+            list(ids),
+        ).fetchall()
+        by_id = {r[0]: r for r in rows}
+        return pd.DataFrame([by_id[i] for i in ids if i in by_id], columns=OFFER_COLUMNS)
+
+    def iter_offers(self, location=None, statuses=None, since=None, until=None, chunksize=5000):
+        """Hot offers matching the filters in ID order, as raw row tuples
+        (id, location, price_cents, volume, term, user, status, created_at,
+        updated_at), `chunksize` at a time. Keyset-paged on id, so memory
+        stays at one chunk however big the book is."""
+        where, params = self._export_filter(location, statuses, since, until)
+        where.insert(0, "id > ?")
+        sql = (
+            "SELECT id, location, price_cents, volume, term, user, status, created_at, updated_at FROM offers "
+            f"WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+        )
+        last_id = 0
+        while True:
+            rows = self.conn.execute(sql, [last_id, *params, chunksize]).fetchall()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+    def count_offers(self, location=None, statuses=None, since=None, until=None):
+        """How many hot offers iter_offers would stream."""
+        where, params = self._export_filter(location, statuses, since, until)
+        return self.conn.execute(
+            f"SELECT COUNT(*) FROM offers WHERE {' AND '.join(where) or '1'}", params
+        ).fetchone()[0]
+
+    @staticmethod
+    def _export_filter(location, statuses, since, until):
+        where, params = [], []
+        if location:
+            where.append("location = ?")
+            params.append(location)
+        if statuses:
+            where.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params += list(statuses)
+        if since is not None:
+            where.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("created_at < ?")
+            params.append(until)
+        return where, params
+
+    def pending_book(self):
+        """Every pending offer, by location then price (for the simulator)."""
+        rows = self.conn.execute(
+            "SELECT id, location, price_cents, volume, term, user, status, version FROM offers WHERE status = 'Pending' "
+            "ORDER BY location, price_cents, id"
+        ).fetchall()
+        return pd.DataFrame(rows, columns=OFFER_COLUMNS)
+
+    def fill_history(self, location, window=None):
+        """Filled volume over the last `window` seconds (all time if None),
+        served from the cheapest tier that still covers the window: raw
+        points while the ring buffer reaches back far enough, then minute,
+        then hour buckets. Columns: Time, Filled, Low, High."""
+        now = time.time()
+        since = now - window if window else 0
+        columns = ["Time", "Filled", "Low", "High"]
+
+        # Raw points serve the window if the ring buffer has never wrapped or
+        # still reaches back past the start of the window
+        oldest_raw = self.conn.execute(
+            "SELECT seq, ts FROM fill_raw WHERE location = ? ORDER BY seq LIMIT 1", (location,)
+        ).fetchone()
+        if oldest_raw is not None and (oldest_raw[0] == 1 or oldest_raw[1] <= since):
+            rows = self.conn.execute(
+                "SELECT ts, filled, filled, filled FROM fill_raw WHERE location = ? AND ts >= ? ORDER BY seq",
+                (location, since),
+            ).fetchall()
+        else:
+            table, width = next(
+                (t, w) for t, w, longest in FILL_TIERS if longest is None or (window and window <= longest)
+            )
+            rows = self.conn.execute(
+                f"SELECT bucket, last, low, high FROM {table} WHERE location = ? AND bucket >= ? ORDER BY bucket",
+                (location, since - since % width),
+            ).fetchall()
+        df = pd.DataFrame(rows, columns=columns)
+        df["Time"] = pd.to_datetime(df["Time"], unit="s")
+        return df
+
+    # --- SELLER ROLLUPS ---
+    # Served from the trigger-maintained seller tables: cost depends on one
+    # seller's rows (or N for the leaderboard), never on the size of the book.
+    def seller_summary(self, user):
+        row = self.conn.execute(
+            "SELECT n_offers, offered_volume, offered_value, pending_volume, accepted_volume, rejected_volume "
+            "FROM seller_totals WHERE user = ?", (user,)
+        ).fetchone()
+        if row is None:
+            return None
+        return _seller_row(row)
+
+    def seller_offers(self, user, statuses=("Pending",), limit=200):
+        """A seller's own offers across terminals, newest first."""
+        marks = ", ".join("?" * len(statuses))
+        rows = self.conn.execute(
+            "SELECT id, location, price_cents, volume, term, user, status, version FROM offers "
+            f"WHERE user = ? AND status IN ({marks}) ORDER BY id DESC LIMIT ?",
+            (user, *statuses, limit),
+        ).fetchall()
+        return pd.DataFrame(rows, columns=OFFER_COLUMNS)
+
+    def seller_breakdown(self, user):
+        """One seller's rollups per location and term."""
+        rows = self.conn.execute(
+            "SELECT location, term, n_offers, offered_volume, offered_value, pending_volume, accepted_volume, "
+            "rejected_volume FROM seller_stats WHERE user = ? ORDER BY location, term", (user,)
+        ).fetchall()
+        return pd.DataFrame(
+            [(loc, term, *_seller_row(r).values()) for loc, term, *r in rows],
+            columns=["Location", "Term"] + SELLER_COLUMNS,
+        )
+
+    def top_sellers(self, n=10, by="accepted_volume"):
+        if by not in ("offered_volume", "accepted_volume"):
+            raise ValueError(f"cannot rank sellers by {by!r}")
+        rows = self.conn.execute(
+            "SELECT user, n_offers, offered_volume, offered_value, pending_volume, accepted_volume, "
+            f"rejected_volume FROM seller_totals ORDER BY {by} DESC LIMIT ?", (n,)
+        ).fetchall()
+        return pd.DataFrame(
+            [(user, *_seller_row(r).values()) for user, *r in rows], columns=["User"] + SELLER_COLUMNS
+        )
+
+    def terms(self, location):
+        rows = self.conn.execute("SELECT DISTINCT term FROM offers WHERE location = ? ORDER BY term", (location,))
+        return [r[0] for r in rows]
+
+    def query_offers(self, location, statuses=LIVE_STATUSES, min_cents=None, max_cents=None,
+                     seller=None, terms=None, limit=50, offset=0):
+        """One page of a location's offers (cheapest first) plus the total
+        number of rows matching the filters."""
+        where = ["location = ?"]
+        params = [location]
+        if statuses:
+            where.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params += list(statuses)
+        if min_cents is not None:
+            where.append("price_cents >= ?")
+            params.append(min_cents)
+        if max_cents is not None:
+            where.append("price_cents <= ?")
+            params.append(max_cents)
+        if seller:
+            # Prefix match so the NOCASE user index can be used
+            where.append("user LIKE ? ESCAPE '\\'")
+            params.append(seller.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if terms:
+            where.append(f"term IN ({', '.join('?' * len(terms))})")
+            params += list(terms)
+        clause = " AND ".join(where)
+
+        total = self.conn.execute(f"SELECT COUNT(*) FROM offers WHERE {clause}", params).fetchone()[0]
+        rows = self.conn.execute(
+            f"SELECT id, location, price_cents, volume, term, user, status, version FROM offers WHERE {clause} "
+            "ORDER BY price_cents, id LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        return pd.DataFrame(rows, columns=OFFER_COLUMNS), total
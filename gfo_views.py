@@ -0,0 +1,100 @@
+# --- SHARED VIEW MODELS ---
+# Nearly every open page is a read-only viewer of the same boards, and what a
+# viewer sees of a location depends only on the book version. The app keeps
+# one ViewCache per round and process (st.cache_resource), so each location's
+# view model (remaining capacity, banner, first board page; figures as a
+# separate entry) is built once per book change and then shared by every
+# session:
+#
+#   views = ViewCache()
+#   view = views.get((store.version(), loc), lambda: build_view(loc))
+#
+# Concurrent misses on the same key wait for one build instead of each
+# running their own. Cached views are shared: treat them as read-only.
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+VIEW_ENTRIES = 64       # views kept: a few book versions of every location
+FIGURE_OVERHEAD = 4096  # rough size of a figure's layout and trace objects
+
+
+def view_bytes(view):
+    """Approximate memory held by a view model (a namedtuple): frames by
+    their deep memory usage, figures by their trace data (which dominates
+    a figure; nothing is serialized to measure it)."""
+    size = sys.getsizeof(view)
+    for value in view:
+        if isinstance(value, pd.DataFrame):
+            size += int(value.memory_usage(deep=True).sum())
+        elif hasattr(value, "data") and hasattr(value, "layout"):
+            size += _figure_bytes(value)
+        else:
+            size += sys.getsizeof(value)
+    return size
+
+
+def _figure_bytes(fig):
+    size = FIGURE_OVERHEAD
+    for trace in fig.data:
+        for name in ("x", "y", "z"):
+            values = getattr(trace, name, None)
+            if values is not None:
+                size += np.asarray(values).nbytes
+    return size
+
+
+class ViewCache:
+    def __init__(self, sizeof=view_bytes, keep=VIEW_ENTRIES):
+        self._sizeof = sizeof
+        self._keep = keep
+        self._views = OrderedDict()  # key -> (view, bytes), least recently used first
+        self._building = {}          # key -> lock held while that view is built
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, build):
+        """The view cached under `key`, building it with build() on a miss."""
+        with self._lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+                self.hits += 1
+                return self._views[key][0]
+            building = self._building.setdefault(key, threading.Lock())
+
+        with building:
+            with self._lock:
+                if key in self._views:
+                    # Built by another session while this one waited
+                    self.hits += 1
+                    return self._views[key][0]
+            try:
+                view = build()
+            except BaseException:
+                with self._lock:
+                    self._building.pop(key, None)
+                raise
+            nbytes = self._sizeof(view)
+            with self._lock:
+                self._views[key] = (view, nbytes)
+                self._building.pop(key, None)
+                self.misses += 1
+                while len(self._views) > self._keep:
+                    self._views.popitem(last=False)
+                    self.evictions += 1
+        return view
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._views),
+                "bytes": sum(nbytes for _, nbytes in self._views.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
@@ -0,0 +1,31 @@
+from gfo_archive import ColdArchive
+
+TS = 1790000000.0
+
+
+def row(offer_id, location, month):
+    return (offer_id, location, month, 1.25, 100, "1mo", "Amy", "Rejected", TS, TS)
+
+
+def test_months_come_from_partitions(tmp_path):
+    archive = ColdArchive(str(tmp_path / "archive"))
+    assert archive.months() == []
+    archive.write([row(1, "Vernal, Utah", "2026-09"), row(2, "Vernal, Utah", "2026-10"),
+                   row(3, "Victoria, Texas", "2026-08")])
+    assert archive.months() == ["2026-08", "2026-09", "2026-10"]
+    assert archive.months("Vernal, Utah") == ["2026-09", "2026-10"]
+    assert archive.months("Port Mackenzie") == []
+
+
+def test_limited_query_stops_early_and_dedupes(tmp_path):
+    archive = ColdArchive(str(tmp_path / "archive"))
+    for first in range(1, 50, 10):
+        archive.write([row(i, "Vernal, Utah", "2026-10") for i in range(first, first + 10)])
+    # A batch written twice, as after a crash before the hot delete
+    archive.write([row(i, "Vernal, Utah", "2026-10") for i in range(5, 15)])
+
+    preview = archive.query("Vernal, Utah", "2026-10", limit=15)
+    assert len(preview) == 15 and preview["id"].is_unique
+    assert len(archive.query("Vernal, Utah", limit=100)) == 50
+    assert archive.count("Vernal, Utah", month="2026-10") == 60
+    assert archive.count("Vernal, Utah", month="2026-09") == 0
@@ -0,0 +1,48 @@
+import json
+import os
+
+from gfo_alerts import AlertBus, webhook_outbox
+from gfo_auctions import AuctionRegistry
+from gfo_store import OfferStore
+
+TERMINALS = {"Victoria, Texas": 1000, "Vernal, Utah": 2000}
+
+
+def test_rounds_get_their_own_books(tmp_path):
+    registry = AuctionRegistry(str(tmp_path / "auctions.db"))
+    first = registry.ensure_first("Round 1", TERMINALS, str(tmp_path / "book.db"), str(tmp_path / "archive"))
+    assert registry.ensure_first("Again", TERMINALS, "x.db", "x") is None
+    second = registry.create("Round 2", {"Vernal, Utah": 500, "Victoria, Texas": 700}, opens_at=100, closes_at=200)
+
+    assert [a.id for a in registry.auctions()] == [second.id, first.id]
+    assert first.book_path == str(tmp_path / "book.db")
+    assert os.path.dirname(second.book_path) == str(tmp_path) and second.book_path != first.book_path
+    assert second.archive_dir != first.archive_dir
+    assert second.locations == ["Vernal, Utah", "Victoria, Texas"] and second.capacities["Victoria, Texas"] == 700
+    assert [second.is_open(t) for t in (99, 100, 199, 200)] == [False, True, True, False]
+
+    registry.close(first.id, when=50)
+    assert not registry.get(first.id).is_open(60) and registry.get(first.id).is_open(40)
+    assert registry.get(999) is None
+
+
+def test_alerts_from_different_rounds_stay_apart(tmp_path):
+    registry = AuctionRegistry(str(tmp_path / "auctions.db"))
+    outbox = str(tmp_path / "alerts.jsonl")
+    for name in ("Round 1", "Round 2"):
+        auction = registry.create(name, TERMINALS)
+        store = OfferStore(auction.book_path)
+        bus = AlertBus(store, auction.id, auction.name)
+        bus.subscribe(webhook_outbox(outbox))
+        offer_id = store.add_offer("Victoria, Texas", 100, 1000, "1mo", "Amy")
+        store.apply_decisions({offer_id: "Accepted"}, 1000)
+        bus.pump()
+        bus.deliver()
+        assert [(a.auction, a.level) for a in bus.since(0)] == [(name, "FULL")]
+
+    with open(outbox, encoding="utf-8") as f:
+        bodies = [json.loads(line) for line in f]
+    # Same terminal, same per-book alert ID: only the round tells them apart
+    assert [(b["auction_id"], b["auction"], b["id"], b["location"]) for b in bodies] == [
+        (1, "Round 1", 1, "Victoria, Texas"), (2, "Round 2", 1, "Victoria, Texas"),
+    ]
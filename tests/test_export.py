@@ -0,0 +1,72 @@
+import csv
+import io
+
+import pyarrow.parquet as pq
+import pytest
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+from gfo_archive import ColdArchive
+from gfo_export import export_bytes, export_offers
+from gfo_store import OfferStore
+
+LOC = "Vernal, Utah"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OfferStore(str(tmp_path / "book.db"), ColdArchive(str(tmp_path / "archive")))
+    ids = [store.add_offer(LOC, cents, 100 * (i + 1), "1mo", "Amy") for i, cents in enumerate([-125, 1, 250, 99])]
+    store.apply_decisions({ids[0]: "Rejected", ids[1]: "Rejected"}, 10**9)
+    store.archive_terminal()
+    # A crash after the archive write but before the hot delete leaves an
+    # offer in both tiers
+    row = store.conn.execute(
+        "SELECT id, location, price_cents, volume, term, user, status, created_at, updated_at FROM offers WHERE id = ?",
+        (ids[2],),
+    ).fetchone()
+    store.archive.write([row[:2] + ("2026-10", row[2] / 100) + row[3:]])
+    return store
+
+
+def exported_csv(data):
+    return list(csv.DictReader(io.StringIO(data.decode("utf-8"))))
+
+
+def test_csv_has_each_offer_once_with_exact_prices(store):
+    out = io.BytesIO()
+    assert export_offers(store, out, "csv") == 4
+    rows = exported_csv(out.getvalue())
+    assert [(r["ID"], r["Price"], r["Status"]) for r in rows] == [
+        ("1", "-1.25", "Rejected"), ("2", "0.01", "Rejected"), ("3", "2.50", "Pending"), ("4", "0.99", "Pending"),
+    ]
+
+
+def test_parquet_matches_csv(store):
+    out = io.BytesIO()
+    export_offers(store, out, "parquet", statuses=["Pending"])
+    table = pq.read_table(io.BytesIO(out.getvalue()))
+    assert table.column("ID").to_pylist() == [3, 4]
+    assert [str(p) for p in table.column("Price").to_pylist()] == ["2.50", "0.99"]
+
+
+def test_xlsx_round_trips(store):
+    openpyxl = pytest.importorskip("openpyxl")
+    sheet = openpyxl.load_workbook(io.BytesIO(export_bytes(store, "xlsx"))).active
+    assert [r[0] for r in sheet.iter_rows(min_row=2, values_only=True)] == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_browser_download_serves_the_export(store, fmt):
+    # The same path a deferred st.download_button takes when clicked
+    storage = MemoryMediaFileStorage("/media")
+    manager = MediaFileManager(storage)
+    file_id = manager.add_deferred(lambda: export_bytes(store, fmt), None, "exp_download")
+    url = manager.execute_deferred(file_id)
+    served = storage.get_file(url.rsplit("/", 1)[-1].split(".")[0]).content
+    expected = io.BytesIO()
+    export_offers(store, expected, fmt)
+    if fmt == "csv":
+        assert served == expected.getvalue()
+    else:
+        assert pq.read_table(io.BytesIO(served)).equals(pq.read_table(io.BytesIO(expected.getvalue())))
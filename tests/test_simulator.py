@@ -0,0 +1,38 @@
+import random
+
+import pandas as pd
+import pytest
+
+import gfo_simulator
+from gfo_simulator import cleared_offers, simulate_clearing
+
+LOCATIONS = ["Victoria, Texas", "Vernal, Utah", "Port Mackenzie"]
+
+
+def random_book(n=200, seed=7):
+    rng = random.Random(seed)
+    # Port Mackenzie gets no offers: empty locations must still get rows
+    return pd.DataFrame({
+        "Location": [rng.choice(LOCATIONS[:2]) for _ in range(n)],
+        "Cents": [rng.randrange(-500, 500, 25) for _ in range(n)],
+        "Volume": [rng.randrange(100, 2000, 100) for _ in range(n)],
+    })
+
+
+@pytest.mark.parametrize("block_cells", [gfo_simulator.SIM_BLOCK_CELLS, 50])
+def test_sweep_matches_clearing_one_scenario_at_a_time(monkeypatch, block_cells):
+    monkeypatch.setattr(gfo_simulator, "SIM_BLOCK_CELLS", block_cells)
+    book = random_book()
+    accepted = {"Victoria, Texas": 5000, "Vernal, Utah": 0, "Port Mackenzie": 0}
+    capacities, floors = [4000, 20000, 60000], [-600, -100, 0, 250, 600]
+
+    results = simulate_clearing(book, accepted, capacities, floors)
+    assert len(results) == len(LOCATIONS) * len(capacities) * len(floors)
+    for row in results.itertuples(index=False):
+        loc, capacity, floor, clearing, volume, n = row
+        taken = cleared_offers(book[book["Location"] == loc], accepted[loc], capacity, floor)
+        assert (volume, n) == (taken["Volume"].sum(), len(taken))
+        if taken.empty:
+            assert clearing is pd.NA
+        else:
+            assert clearing == taken["Cents"].max()
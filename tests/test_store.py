@@ -0,0 +1,246 @@
+import random
+import time
+
+import pytest
+
+import gfo_store
+from gfo_archive import ColdArchive
+from gfo_store import LIVE_STATUSES, CapacityError, OfferConflict, OfferStore
+
+LOCATIONS = ["Victoria, Texas", "Vernal, Utah", "Port Mackenzie"]
+TERMS = ["1mo", "3mo", "6mo"]
+SELLERS = ["Amy", "amos", "Bea", "Cy_1", "Cy%2"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OfferStore(str(tmp_path / "book.db"))
+
+
+def seed_random(store, n=300, seed=3):
+    rng = random.Random(seed)
+    store.seed([
+        {
+            "Location": rng.choice(LOCATIONS),
+            "Cents": rng.randrange(-600, 400, 5),
+            "Volume": rng.randrange(100, 3000, 100),
+            "Term": rng.choice(TERMS),
+            "User": rng.choice(SELLERS),
+            "Status": rng.choice(["Pending", "Pending", "Accepted", "Rejected"]),
+        }
+        for _ in range(n)
+    ])
+
+
+def offers(store):
+    return store.conn.execute(
+        "SELECT id, location, price_cents, volume, term, user, status FROM offers"
+    ).fetchall()
+
+
+def churn(store, seed=5):
+    # Amendments, cancellations and decisions: every trigger path
+    rng = random.Random(seed)
+    for offer_id, _, _, _, _, user, status in offers(store):
+        if status != "Pending":
+            continue
+        version = store.conn.execute("SELECT version FROM offers WHERE id = ?", (offer_id,)).fetchone()[0]
+        roll = rng.random()
+        if roll < 0.3:
+            store.amend_offer(offer_id, user, version, rng.randrange(-600, 400), rng.randrange(100, 3000, 100))
+        elif roll < 0.45:
+            store.cancel_offer(offer_id, user, version)
+        elif roll < 0.7:
+            store.apply_decisions({offer_id: rng.choice(["Accepted", "Rejected"])}, 10**9)
+
+
+# --- PAGING & FILTERS ---
+def test_pages_walk_the_board_cheapest_first(store):
+    seed_random(store)
+    loc = LOCATIONS[0]
+    expected = sorted(
+        ((cents, offer_id) for offer_id, l, cents, _, _, _, status in offers(store) if l == loc and status in LIVE_STATUSES)
+    )
+    seen = []
+    for page in range(0, len(expected), 7):
+        df, total = store.query_offers(loc, limit=7, offset=page)
+        assert total == len(expected)
+        seen += list(zip(df["Cents"], df["ID"]))
+    assert seen == expected
+
+
+def test_filters_match_a_plain_scan(store):
+    seed_random(store)
+    loc = LOCATIONS[1]
+    df, total = store.query_offers(loc, statuses=("Pending",), min_cents=-200, max_cents=100,
+                                   seller="am", terms=["1mo", "6mo"], limit=1000)
+    expected = {
+        offer_id for offer_id, l, cents, _, term, user, status in offers(store)
+        if l == loc and status == "Pending" and -200 <= cents <= 100
+        and user.lower().startswith("am") and term in ("1mo", "6mo")
+    }
+    assert set(df["ID"]) == expected and total == len(expected)
+
+
+def test_seller_prefix_is_literal(store):
+    seed_random(store)
+    df, _ = store.query_offers(LOCATIONS[2], seller="Cy_", limit=1000)
+    assert set(df["User"]) <= {"Cy_1"}
+    df, _ = store.query_offers(LOCATIONS[2], seller="Cy%", limit=1000)
+    assert set(df["User"]) <= {"Cy%2"}
+
+
+def test_board_page_uses_the_price_index(store):
+    plan = store.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM offers WHERE location = ? AND status IN (?, ?) "
+        "ORDER BY price_cents, id LIMIT 50", (LOCATIONS[0], *LIVE_STATUSES)
+    ).fetchall()
+    assert not any("TEMP B-TREE" in row[3] for row in plan)
+
+
+# --- BATCH DECISIONS ---
+def test_capacity_is_checked_per_batch(store):
+    loc = LOCATIONS[0]
+    ids = [store.add_offer(loc, 100, 600, "1mo", "Amy") for _ in range(2)]
+    with pytest.raises(CapacityError):
+        store.apply_decisions({i: "Accepted" for i in ids}, 1000)
+    assert store.accepted_volume(loc) == 0
+    assert store.apply_decisions({ids[0]: "Accepted"}, 1000) == (1, 0)
+
+
+# --- TRIGGER-MAINTAINED AGGREGATES ---
+def check_aggregates(store):
+    rows = offers(store)
+    for loc in LOCATIONS:
+        live = [(cents, volume) for _, l, cents, volume, _, _, status in rows if l == loc and status in LIVE_STATUSES]
+        stats = store.supply_stats(loc, 10**9)
+        assert stats["live_volume"] == sum(v for _, v in live)
+        assert stats["live_offers"] == len(live)
+        if live:
+            assert stats["vwap"] == pytest.approx(sum(c * v for c, v in live) / sum(v for _, v in live))
+        assert store.accepted_volume(loc) == sum(
+            volume for _, l, _, volume, _, _, status in rows if l == loc and status == "Accepted"
+        )
+        levels = {}
+        for cents, volume in live:
+            levels[cents] = levels.get(cents, 0) + volume
+        curve = store.supply_curve(loc)
+        assert list(zip(curve["Cents"], curve["Volume"])) == sorted(levels.items())
+
+
+def test_aggregates_follow_every_change(store):
+    seed_random(store)
+    check_aggregates(store)
+    churn(store)
+    check_aggregates(store)
+
+
+def test_fills_at_is_the_marginal_price(store):
+    loc = LOCATIONS[0]
+    for cents, volume in [(300, 1000), (-100, 500), (50, 700)]:
+        store.add_offer(loc, cents, volume, "1mo", "Amy")
+    assert store.supply_stats(loc, 1200)["fills_at"] == 50
+    assert store.supply_stats(loc, 5000)["fills_at"] is None
+
+
+def test_archiving_keeps_live_aggregates(tmp_path):
+    store = OfferStore(str(tmp_path / "book.db"), ColdArchive(str(tmp_path / "archive")))
+    seed_random(store)
+    before = {loc: store.supply_stats(loc, 10**9) for loc in LOCATIONS}
+    assert store.archive_terminal() > 0
+    assert store.terminal_count() == 0
+    assert {loc: store.supply_stats(loc, 10**9) for loc in LOCATIONS} == before
+
+
+# --- SELLER ROLLUPS ---
+def check_sellers(store):
+    rows = offers(store)
+    for seller in SELLERS:
+        mine = [r for r in rows if r[5] == seller]
+        if not mine:
+            continue
+        summary = store.seller_summary(seller)
+        assert summary["Offers"] == len(mine)
+        assert summary["Offered"] == sum(r[3] for r in mine)
+        for status in ("Pending", "Accepted", "Rejected"):
+            assert summary[status] == sum(r[3] for r in mine if r[6] == status)
+        assert summary["Avg Cents"] == pytest.approx(sum(r[2] * r[3] for r in mine) / sum(r[3] for r in mine))
+
+
+def test_seller_rollups_follow_every_change(store):
+    seed_random(store)
+    check_sellers(store)
+    churn(store)
+    check_sellers(store)
+    assert store.seller_summary("Nobody") is None
+
+
+# --- FILL HISTORY ---
+def test_fill_history_reads_the_cheapest_covering_tier(store):
+    loc = LOCATIONS[0]
+    now = time.time()
+    # A point every 10 minutes for 1500 points: the raw ring buffer keeps
+    # the newest 1000 (about 7 days)
+    points = [(now - (1500 - i) * 600 + 7.5, i * 10) for i in range(1500)]
+    with store._write() as conn:
+        for ts, filled in points:
+            store._record_fill(conn, loc, filled, ts)
+
+    day = store.fill_history(loc, 24 * 3600)
+    assert list(day["Filled"]) == [f for ts, f in points if ts >= now - 24 * 3600]
+
+    week = store.fill_history(loc, 8 * 24 * 3600)
+    assert (week["Time"].dt.second == 0).all() and len(week) > 1000
+
+    everything = store.fill_history(loc)
+    assert (everything["Time"].dt.minute == 0).all()
+    assert everything["Low"].iloc[0] == 0 and everything["Filled"].iloc[-1] == points[-1][1]
+
+
+# --- SUBMISSIONS ---
+def test_a_bad_submission_fails_alone(store):
+    good = [store.submit(f"k{i}", LOCATIONS[0], 100 + i, 500, "1mo", "Amy") for i in range(5)]
+    with pytest.raises(ValueError):
+        store.submit("fractional", LOCATIONS[0], 100.5, 500, "1mo", "Amy")
+    bad = store.submit("unbindable", LOCATIONS[0], 100, 500, "1mo", object())
+    store.flush()
+    assert [f.result()[1] for f in good] == [False] * 5
+    assert bad.exception() is not None
+    assert store.supply_stats(LOCATIONS[0], 10**9)["live_offers"] == 5
+    # A repeated key resolves to the first offer
+    assert store.submit("k0", LOCATIONS[0], 100, 500, "1mo", "Amy").result() == (good[0].result()[0], True)
+
+
+# --- CAPACITY ALERTS ---
+def test_alerts_are_claimed_once(tmp_path):
+    path = str(tmp_path / "book.db")
+    first, second = OfferStore(path), OfferStore(path)
+    offer_id = first.add_offer(LOCATIONS[0], 100, 1000, "1mo", "Amy")
+    first.apply_decisions({offer_id: "Accepted"}, 1000)
+    claimed = first.claim_alerts() + second.claim_alerts()
+    assert [row[2] for row in claimed] == ["FULL"]
+    assert first.claim_alerts() == [] and second.claim_alerts() == []
+
+
+# --- AMENDMENTS ---
+def test_amend_refuses_stale_versions_and_bad_volumes(store):
+    offer_id = store.add_offer(LOCATIONS[0], 100, 500, "1mo", "Amy")
+    assert store.amend_offer(offer_id, "Amy", 1, volume=700) == 2
+    with pytest.raises(OfferConflict):
+        store.amend_offer(offer_id, "Amy", 1, volume=800)
+    for volume in (0, -100, float("nan"), 250.5):
+        with pytest.raises(ValueError):
+            store.amend_offer(offer_id, "Amy", 2, volume=volume)
+    check_aggregates(store)
+
+
+def test_writes_inside_a_snapshot_still_trigger_archiving(tmp_path, monkeypatch):
+    monkeypatch.setattr(gfo_store, "ARCHIVE_AFTER", 3)
+    store = OfferStore(str(tmp_path / "book.db"), ColdArchive(str(tmp_path / "archive")))
+    ids = [store.add_offer(LOCATIONS[0], 100, 500, "1mo", "Amy") for _ in range(4)]
+    # The page renders inside a snapshot taken before its own writes
+    with store.snapshot():
+        store.apply_decisions({i: "Rejected" for i in ids[:2]}, 10**9)
+        store.cancel_offer(ids[2], "Amy", 1)
+    assert store.terminal_count() == 0
+    assert store.archive.count() == 3
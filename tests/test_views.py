@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import namedtuple
+
+import pandas as pd
+import pytest
+
+from gfo_views import ViewCache, view_bytes
+
+View = namedtuple("View", "label frame")
+
+
+def test_a_view_is_built_once_per_key():
+    views, builds = ViewCache(), []
+
+    def build(n):
+        builds.append(n)
+        return View(f"v{n}", None)
+
+    first = views.get((1, "A"), lambda: build(1))
+    assert views.get((1, "A"), lambda: build(2)) is first
+    views.get((2, "A"), lambda: build(3))
+    assert builds == [1, 3]
+    stats = views.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+
+
+def test_least_recently_used_views_are_evicted():
+    views = ViewCache(keep=2)
+    for key in ("a", "b"):
+        views.get(key, lambda: View(key, None))
+    views.get("a", lambda: View("again", None))  # "b" is now the oldest
+    views.get("c", lambda: View("c", None))
+    assert views.stats()["evictions"] == 1
+    assert views.get("a", lambda: View("rebuilt", None)).label == "a"
+    assert views.get("b", lambda: View("rebuilt", None)).label == "rebuilt"
+
+
+def test_concurrent_misses_wait_for_one_build():
+    views, started, release, builds = ViewCache(), threading.Event(), threading.Event(), []
+
+    def slow_build():
+        builds.append(1)
+        started.set()
+        release.wait(5)
+        return View("slow", None)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(views.get("k", slow_build))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    time.sleep(0.1)  # let the others reach the in-flight build
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(builds) == 1
+    assert len(results) == 4 and all(r is results[0] for r in results)
+
+
+def test_a_failed_build_is_not_cached():
+    views = ViewCache()
+
+    def broken():
+        raise RuntimeError("book unavailable")
+
+    with pytest.raises(RuntimeError):
+        views.get("k", broken)
+    assert views.get("k", lambda: View("ok", None)).label == "ok"
+
+
+def test_view_bytes_counts_frames_deeply():
+    frame = pd.DataFrame({"User": ["seller " * 20] * 1000})
+    assert view_bytes(View("x", frame)) > view_bytes(View("x", None)) + 100_000